@@ -0,0 +1,104 @@
+import re
+
+CALL_REGEX = re.compile(r"(?:^|\srun )function (\S+?):(\S+)")
+
+DEFAULT_CHAIN_LENGTH = 65536
+BRANCH_WEIGHT = 0.5
+
+UNBOUNDED = float("inf")
+
+def formatCost(cost):
+    if cost == UNBOUNDED:
+        return "unbounded"
+    if cost == int(cost):
+        return f"{int(cost)}"
+
+    return f"{cost:.1f}"
+
+class CostAnalyzer:
+    def __init__(self, functions, namespace, loops = None):
+        self.functions = functions
+        self.namespace = namespace
+
+        # A loop function calls itself once per iteration, so its cost is one pass times its iteration bound
+        self.loops = loops if loops != None else {}
+
+        self.costs = {}
+        self.visiting = set()
+
+    def isConditional(self, line):
+        return line.startswith("execute ") and (" if " in line or " unless " in line)
+
+    def cost(self, name):
+        if name in self.costs:
+            return self.costs[name]
+        if name in self.visiting:
+            return UNBOUNDED, 0
+
+        self.visiting.add(name)
+
+        worst = 0
+        typical = 0
+        for line in self.functions[name].split("\n"):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            worst += 1
+            typical += 1
+
+            match = CALL_REGEX.search(line)
+            if match and match.group(1) == self.namespace and match.group(2) == name and name in self.loops:
+                continue
+
+            if match and match.group(1) == self.namespace and match.group(2) in self.functions:
+                calleeWorst, calleeTypical = self.cost(match.group(2))
+
+                worst += calleeWorst
+                typical += calleeTypical * (BRANCH_WEIGHT if self.isConditional(line) else 1)
+
+        self.visiting.discard(name)
+
+        if name in self.loops:
+            iterations = self.loops[name]
+
+            if iterations == None:
+                worst = UNBOUNDED
+            else:
+                worst *= iterations
+                typical *= iterations
+
+        self.costs[name] = (worst, typical)
+
+        return worst, typical
+
+    def analyze(self, entries):
+        for name in entries:
+            if name in self.functions:
+                self.cost(name)
+
+        return self.costs
+
+class Budget:
+    def __init__(self, maxChainLength = DEFAULT_CHAIN_LENGTH, tick = None, strict = False):
+        self.maxChainLength = maxChainLength
+        self.tick = tick
+        self.strict = strict
+
+    def check(self, costs, tickEntries, loadEntries, loops = ()):
+        problems = []
+
+        for name in loops:
+            if name in costs and costs[name][0] > self.maxChainLength:
+                problems.append(f"Loop {name} can run {formatCost(costs[name][0])} commands, more than maxCommandChainLength ({self.maxChainLength})")
+
+        for name in tickEntries + loadEntries:
+            if name in costs and costs[name][0] > self.maxChainLength:
+                problems.append(f"{name} can run {formatCost(costs[name][0])} commands in one chain, more than maxCommandChainLength ({self.maxChainLength})")
+
+        if self.tick != None:
+            tickWorst = sum(costs[name][0] for name in tickEntries if name in costs)
+            if tickWorst > self.tick:
+                problems.append(f"A tick can run {formatCost(tickWorst)} commands, more than the tick budget ({self.tick})")
+
+        return problems
@@ -0,0 +1,88 @@
+import os
+
+DEFAULT_PACK = {
+    "version": "1.21.3",
+    "description": "\"A datapack built by MCLang\""
+}
+
+class BuildError(Exception):
+    def __init__(self, errors, warnings):
+        super().__init__("\n".join(info["text"] for info in errors))
+
+        self.errors = errors
+        self.warnings = warnings
+
+# Stands in for Diagnostics, keeping records instead of printing them
+class Collector:
+    def __init__(self):
+        self.errorInfos = []
+        self.warningInfos = []
+
+    def debug(self, text):
+        pass
+
+    def warning(self, info):
+        self.warningInfos.append(info)
+
+    def error(self, info):
+        self.errorInfos.append(info)
+
+def readConfig(config):
+    import configparser
+
+    parser = configparser.ConfigParser()
+
+    if isinstance(config, configparser.ConfigParser):
+        parser.read_dict(config)
+    elif isinstance(config, str):
+        parser.read_string(config)
+    elif config != None:
+        parser.read_dict(config)
+
+    if not parser.has_section("pack"):
+        parser.add_section("pack")
+
+    for key in DEFAULT_PACK:
+        if not key in parser["pack"]:
+            parser["pack"][key] = DEFAULT_PACK[key]
+
+    return parser
+
+def compileSources(sources, config = None, name = "mclang", warnings = None):
+    # The compiler is only imported on first use, so importing this module stays cheap
+    import mclang
+
+    if isinstance(sources, str):
+        sources = {"main.mclang": sources}
+
+    diagnostics = Collector()
+    options = mclang.BuildOptions()
+    profiler = mclang.Profiler(False)
+
+    packConfig = mclang.readConfig(readConfig(config), name)
+
+    units = []
+    unitFunctions = {}
+    unitSymbols = {}
+
+    for relPath in sorted(sources):
+        unitName = relPath.replace("/", os.sep)
+        log = []
+
+        node, error = mclang.parseText(relPath, sources[relPath], options, profiler, log)
+        if error:
+            diagnostics.error(error)
+            raise BuildError(diagnostics.errorInfos, diagnostics.warningInfos)
+
+        units.append(unitName)
+        unitFunctions[unitName], unitSymbols[unitName] = mclang.compileTree(node, unitName, name, options, log, packConfig.loopOptions)
+
+    output = mclang.linkUnits(units, unitFunctions, unitSymbols, name, packConfig, diagnostics)
+
+    if warnings != None:
+        warnings.extend(diagnostics.warningInfos)
+
+    if output == None:
+        raise BuildError(diagnostics.errorInfos, diagnostics.warningInfos)
+
+    return dict(output.files)
@@ -0,0 +1,100 @@
+# Dispatch functions pass the index and value in fixed holders, since they are shared by every caller
+INDEX = "#index MClangVars"
+VALUE = "#value MClangVars"
+
+# Function macros arrived in 1.20.2, older packs get a binary tree of range checks instead
+MACRO_VERSION = [1, 20, 2]
+
+LEAF_SIZE = 2
+
+def storage(namespace):
+    return f"{namespace}:arrays"
+
+def argStorage(namespace):
+    return f"{namespace}:args"
+
+def path(name, index):
+    return f"{name}[{index}]"
+
+def getFunction(name):
+    return f"arrays/{name}/get"
+
+def setFunction(name):
+    return f"arrays/{name}/set"
+
+def initFunction(name):
+    return f"arrays/{name}/init"
+
+def initCommand(namespace, name, size):
+    # Contents survive /reload like scores do, so the list is only rebuilt when it is missing or shorter than declared
+    return f"execute unless data storage {storage(namespace)} {path(name, size - 1)} run function {namespace}:{initFunction(name)}"
+
+def initFunctions(namespace, name, size):
+    values = ", ".join(["0"] * size)
+
+    # Elements the old list does not have fail to copy and stay 0
+    lines = [
+        f"data modify storage {argStorage(namespace)} old set from storage {storage(namespace)} {name}",
+        f"data modify storage {storage(namespace)} {name} set value [{values}]"
+    ]
+    lines.extend(f"data modify storage {storage(namespace)} {path(name, index)} set from storage {argStorage(namespace)} old[{index}]" for index in range(size))
+    lines.append(f"data remove storage {argStorage(namespace)} old")
+
+    return {initFunction(name): "\n".join(lines)}
+
+def readLeaf(namespace, name, index):
+    return f"execute if score {INDEX} matches {index} store result score {VALUE} run data get storage {storage(namespace)} {path(name, index)}"
+
+def writeLeaf(namespace, name, index):
+    return f"execute if score {INDEX} matches {index} store result storage {storage(namespace)} {path(name, index)} int 1 run scoreboard players get {VALUE}"
+
+def treeFunctions(namespace, name, size, root, leaf, prelude):
+    functions = {}
+
+    stack = [(root, 0, size - 1)]
+    while stack:
+        function, low, high = stack.pop()
+
+        lines = list(prelude) if function == root else []
+
+        if high - low + 1 <= LEAF_SIZE:
+            lines.extend(leaf(namespace, name, index) for index in range(low, high + 1))
+        else:
+            middle = (low + high) // 2
+
+            for start, end in ((low, middle), (middle + 1, high)):
+                if start == end:
+                    lines.append(leaf(namespace, name, start))
+                    continue
+
+                child = f"{root}_{start}_{end}"
+
+                lines.append(f"execute if score {INDEX} matches {start}..{end} run function {namespace}:{child}")
+                stack.append((child, start, end))
+
+        functions[function] = "\n".join(lines)
+
+    return functions
+
+def macroFunctions(namespace, name, size, root, line, prelude):
+    store = f"execute store result storage {argStorage(namespace)} index int 1 run scoreboard players get {INDEX}"
+
+    # Negative indices count from the end in NBT paths, so the range check keeps them out
+    call = f"execute if score {INDEX} matches 0..{size - 1} run function {namespace}:{root}_at with storage {argStorage(namespace)}"
+
+    return {
+        root: "\n".join(list(prelude) + [store, call]),
+        root + "_at": line
+    }
+
+def dispatchFunctions(namespace, name, size, macros):
+    getPrelude = [f"scoreboard players set {VALUE} 0"]
+
+    if macros:
+        functions = macroFunctions(namespace, name, size, getFunction(name), f"$execute store result score {VALUE} run data get storage {storage(namespace)} {name}[$(index)]", getPrelude)
+        functions.update(macroFunctions(namespace, name, size, setFunction(name), f"$execute store result storage {storage(namespace)} {name}[$(index)] int 1 run scoreboard players get {VALUE}", []))
+    else:
+        functions = treeFunctions(namespace, name, size, getFunction(name), readLeaf, getPrelude)
+        functions.update(treeFunctions(namespace, name, size, setFunction(name), writeLeaf, []))
+
+    return functions
@@ -0,0 +1,2 @@
+from bench.generator import Generator, generate
+from bench.runner import runSuite, compare
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import sys
+
+from bench.runner import UNITS, calibrate, runSuite, compare
+
+SUITES = {
+    "statements": ("statements", 10000),
+    "nested": ("nested", 150),
+    "arithmetic": ("arithmetic", 500),
+    "functions": ("functions", 2000)
+}
+
+BASELINE = os.path.dirname(os.path.abspath(__file__)) + os.sep + "baseline.json"
+
+def main(args = None):
+    argParser = argparse.ArgumentParser(prog = "bench", description = "Benchmark the MCLang compiler on generated programs.")
+    argParser.add_argument("suites", nargs = "*", help = f"suites to run: {', '.join(SUITES)} (default: all)")
+    argParser.add_argument("--scale", type = float, default = 1, help = "multiply every suite size by this factor")
+    argParser.add_argument("--repeat", type = int, default = 3, help = "timed runs per phase, the fastest one counts")
+    argParser.add_argument("--threshold", type = float, default = 0.25, help = "allowed relative throughput drop or peak memory growth")
+    argParser.add_argument("--baseline", default = BASELINE, help = "baseline results to compare against")
+    argParser.add_argument("--update", action = "store_true", help = "write the results as the new baseline instead of comparing")
+
+    args = argParser.parse_args(args)
+
+    for suite in args.suites:
+        if suite not in SUITES:
+            argParser.error(f"unknown suite {suite}")
+
+    calibration = calibrate(max(args.repeat, 3))
+    print(f"Calibration loop: {calibration * 1000:.2f} ms")
+
+    results = {}
+    for suite in args.suites or list(SUITES):
+        shape, size = SUITES[suite]
+        size = max(1, int(size * args.scale))
+
+        results[suite] = runSuite(shape, size, args.repeat)
+        results[suite]["calibration"] = calibration
+
+        print(f"{suite} ({shape}, size {size}):")
+        for phase, entry in results[suite]["phases"].items():
+            unit = UNITS[phase]
+            print(f"  {phase}: {entry['seconds'] * 1000:.2f} ms, {entry[unit]} {unit} ({entry[unit + 'PerSecond']:.0f} {unit}/s), peak {entry['peakBytes'] / 1024:.1f} KiB")
+
+    if args.update:
+        baseline = {}
+        if os.path.isfile(args.baseline):
+            with open(args.baseline, "r") as file:
+                baseline = json.load(file)
+
+        baseline.update(results)
+
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent = 4)
+
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update to create one")
+        return
+
+    with open(args.baseline, "r") as file:
+        baseline = json.load(file)
+
+    for suite in list(results):
+        if suite not in baseline:
+            continue
+
+        if baseline[suite]["size"] != results[suite]["size"]:
+            print(f"Skipping {suite}: baseline was recorded at size {baseline[suite]['size']}")
+            del results[suite]
+        elif "calibration" not in baseline[suite]:
+            print(f"Skipping {suite}: baseline has no calibration time, record it again with --update")
+            del results[suite]
+
+    problems = compare(results, baseline, args.threshold)
+    if problems:
+        print("Performance regressed:")
+        for problem in problems:
+            print(f"  {problem}")
+
+        sys.exit(1)
+
+    print("No regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import random
+import string
+
+OPERATORS = ("+", "-", "*", "/")
+COMPARISONS = ("==", "!=", "<", "<=", ">", ">=")
+
+VARIABLES = 64
+
+def name(idx, prefix):
+    # Identifiers are letters and underscores only, and lowercase keeps function files distinct on any file system
+    text = ""
+    while True:
+        text = string.ascii_lowercase[idx % 26] + text
+        idx //= 26
+
+        if idx == 0:
+            return prefix + text
+
+def variable(idx):
+    return name(idx % VARIABLES, "v_")
+
+def function(idx):
+    return name(idx, "fn_")
+
+class Generator:
+    def __init__(self, seed = 0):
+        self.random = random.Random(seed)
+
+    def operand(self):
+        if self.random.random() < 0.4:
+            return str(self.random.randint(0, 99))
+
+        return variable(self.random.randrange(VARIABLES))
+
+    def expression(self, terms):
+        parts = [self.operand()]
+        for _ in range(terms - 1):
+            parts.append(self.random.choice(OPERATORS))
+            parts.append(self.operand())
+
+        return " ".join(parts)
+
+    def condition(self):
+        return f"{variable(self.random.randrange(VARIABLES))} {self.random.choice(COMPARISONS)} {self.operand()}"
+
+    def statement(self, indent):
+        if self.random.random() < 0.05:
+            return f"{indent}print({self.operand()})"
+
+        return f"{indent}{variable(self.random.randrange(VARIABLES))} = {self.expression(self.random.randint(1, 4))}"
+
+    def statements(self, count):
+        lines = ["func load() {", "    v_a = 0", "}", "func tick() {"]
+        lines.extend(self.statement("    ") for _ in range(count))
+        lines.append("}")
+
+        return "\n".join(lines) + "\n"
+
+    def nested(self, depth):
+        lines = ["func tick() {"]
+        for level in range(depth):
+            lines.append("    " * (level + 1) + f"if {self.condition()} {{")
+            lines.append(self.statement("    " * (level + 2)))
+
+        for level in reversed(range(depth)):
+            lines.append("    " * (level + 1) + "}")
+
+        lines.append("}")
+
+        return "\n".join(lines) + "\n"
+
+    def arithmetic(self, length, count = 10):
+        lines = ["func tick() {"]
+        for idx in range(count):
+            lines.append(f"    {variable(idx)} = {self.expression(length)}")
+
+        lines.append("}")
+
+        return "\n".join(lines) + "\n"
+
+    def functions(self, count):
+        lines = []
+        for idx in range(count):
+            lines.append(f"func {function(idx)}() {{")
+            lines.append(self.statement("    "))
+            lines.append(self.statement("    "))
+            lines.append("}")
+
+        lines.append("func tick() {")
+        for idx in range(count):
+            lines.append(f"    {function(idx)}()")
+
+        lines.append("}")
+
+        return "\n".join(lines) + "\n"
+
+SHAPES = {
+    "statements": Generator.statements,
+    "nested": Generator.nested,
+    "arithmetic": Generator.arithmetic,
+    "functions": Generator.functions
+}
+
+def generate(shape, size, seed = 0):
+    return SHAPES[shape](Generator(seed), size)
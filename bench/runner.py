@@ -0,0 +1,172 @@
+import contextlib
+import gc
+import io
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from lexer import Lexer
+from parser import Parser
+from compiler import Compiler
+from optimizer import Optimizer, Peephole
+from commands import serialize
+from profiler import countNodes
+from mclang import build
+
+from bench.generator import generate
+
+CONFIG = "[pack]\nversion=1.21.3\ndescription=\"MCLang benchmark\"\n"
+
+UNITS = {
+    "lexing": "tokens",
+    "parsing": "nodes",
+    "compiling": "nodes",
+    "build": "lines"
+}
+
+CALIBRATION_ROUNDS = 200000
+
+def fastest(setup, action, repeat):
+    best = None
+    for _ in range(repeat):
+        value = setup()
+
+        # Like timeit, keep collector pauses that depend on earlier suites out of the timings
+        gc.collect()
+        gc.disable()
+
+        try:
+            start = time.perf_counter()
+            action(value)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+
+        if best == None or elapsed < best:
+            best = elapsed
+
+    return best
+
+def calibrationWork(rounds):
+    # String building and dict lookups, the same kind of work the compiler spends its time on
+    counts = {}
+    for idx in range(rounds):
+        key = "t" + str(idx % 97)
+        counts[key] = counts.get(key, 0) + 1
+
+    return counts
+
+def calibrate(repeat):
+    return fastest(lambda: CALIBRATION_ROUNDS, calibrationWork, repeat)
+
+def measure(setup, action, repeat):
+    best = fastest(setup, action, repeat)
+
+    # Tracing slows everything down, so the peak comes from its own run
+    value = setup()
+
+    tracemalloc.start()
+    action(value)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak
+
+def compileTree(node):
+    node = Optimizer().visit(node)
+
+    compiler = Compiler("bench")
+    compiler.visit(node)
+
+    for name in compiler.files:
+        serialize(Peephole().optimize(compiler.files[name]))
+
+def buildProject(projectFolder):
+    with contextlib.redirect_stdout(io.StringIO()):
+        build(projectFolder)
+
+def cleanProject(projectFolder):
+    buildPath = projectFolder + os.sep + "build"
+    if os.path.exists(buildPath):
+        shutil.rmtree(buildPath)
+
+    os.mkdir(buildPath)
+
+    return projectFolder
+
+def result(phase, seconds, peak, count):
+    unit = UNITS[phase]
+
+    return {
+        "seconds": seconds,
+        "peakBytes": peak,
+        unit: count,
+        f"{unit}PerSecond": count / seconds if seconds > 0 else 0
+    }
+
+def runSuite(shape, size, repeat = 3, seed = 0):
+    code = generate(shape, size, seed)
+    phases = {}
+
+    tokens, error = Lexer("bench.mclang", code).lex()
+    if error:
+        raise ValueError(f"Generated {shape} program does not lex:\n{error}")
+
+    ast = Parser(tokens).parse()
+    if ast.error:
+        raise ValueError(f"Generated {shape} program does not parse:\n{ast.error}")
+
+    nodes = countNodes(ast.node)
+
+    seconds, peak = measure(lambda: code, lambda code: Lexer("bench.mclang", code).lex(), repeat)
+    phases["lexing"] = result("lexing", seconds, peak, len(tokens))
+
+    seconds, peak = measure(lambda: tokens, lambda tokens: Parser(tokens).parse(), repeat)
+    phases["parsing"] = result("parsing", seconds, peak, nodes)
+
+    # The optimizer rewrites the tree in place, so every run compiles a freshly parsed one
+    seconds, peak = measure(lambda: Parser(tokens).parse().node, compileTree, repeat)
+    phases["compiling"] = result("compiling", seconds, peak, nodes)
+
+    with tempfile.TemporaryDirectory() as folder:
+        projectFolder = folder + os.sep + "bench"
+        os.makedirs(projectFolder + os.sep + "src")
+
+        with open(projectFolder + os.sep + "src" + os.sep + "config.cfg", "w") as file:
+            file.write(CONFIG)
+
+        with open(projectFolder + os.sep + "src" + os.sep + "main.mclang", "w") as file:
+            file.write(code)
+
+        seconds, peak = measure(lambda: cleanProject(projectFolder), buildProject, repeat)
+        phases["build"] = result("build", seconds, peak, code.count("\n"))
+
+    return {"shape": shape, "size": size, "phases": phases}
+
+def compare(results, baseline, threshold):
+    problems = []
+
+    for suite in results:
+        if suite not in baseline:
+            continue
+
+        for phase in results[suite]["phases"]:
+            if phase not in baseline[suite]["phases"]:
+                continue
+
+            current = results[suite]["phases"][phase]
+            previous = baseline[suite]["phases"][phase]
+            rate = UNITS[phase] + "PerSecond"
+
+            # The baseline may come from another machine, so its throughput is scaled by how fast each ran the calibration loop
+            expected = previous[rate] * baseline[suite]["calibration"] / results[suite]["calibration"]
+
+            if current[rate] < expected * (1 - threshold):
+                problems.append(f"{suite} {phase}: {current[rate]:.0f} {UNITS[phase]}/s, baseline {expected:.0f} {UNITS[phase]}/s scaled to this machine")
+
+            if current["peakBytes"] > previous["peakBytes"] * (1 + threshold):
+                problems.append(f"{suite} {phase}: peak {current['peakBytes'] / 1024:.1f} KiB, baseline {previous['peakBytes'] / 1024:.1f} KiB")
+
+    return problems
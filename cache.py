@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import pickle
+
+CACHE_VERSION = 6
+
+def hashBytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hashFile(path):
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        chunk = file.read(1 << 20)
+        while chunk:
+            digest.update(chunk)
+            chunk = file.read(1 << 20)
+
+    return digest.hexdigest()
+
+def loadAst(path):
+    try:
+        with open(path, "rb") as file:
+            return pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+def saveAst(path, node):
+    try:
+        data = pickle.dumps(node, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, RecursionError):
+        return
+
+    folder = os.path.dirname(path)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    with open(path, "wb") as file:
+        file.write(data)
+
+def toolchainHash():
+    digest = hashlib.sha256()
+    folder = os.path.dirname(os.path.abspath(__file__))
+
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".py"):
+            with open(folder + os.sep + name, "rb") as file:
+                digest.update(file.read())
+
+    return digest.hexdigest()
+
+class BuildCache:
+    def __init__(self, buildFolder):
+        self.buildFolder = buildFolder
+        self.folder = buildFolder + os.sep + ".cache"
+        self.manifestPath = self.folder + os.sep + "manifest.json"
+
+        self.toolchain = toolchainHash()
+        self.manifest = self.load()
+
+    def empty(self):
+        return {"version": CACHE_VERSION, "toolchain": self.toolchain, "sources": {}, "outputs": {}, "archives": {}}
+
+    def load(self):
+        try:
+            with open(self.manifestPath, "r") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return self.empty()
+
+        if manifest.get("version") != CACHE_VERSION or manifest.get("toolchain") != self.toolchain:
+            empty = self.empty()
+            empty["outputs"] = manifest.get("outputs", {})
+            empty["archives"] = manifest.get("archives", {})
+
+            return empty
+
+        return manifest
+
+    def save(self):
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+
+        with open(self.manifestPath, "w") as file:
+            json.dump(self.manifest, file)
+
+    def astPath(self, name):
+        return self.folder + os.sep + hashBytes(name.encode())[:16] + ".ast"
+
+    def getFunctions(self, name, sourceHash, namespace, loopOptions):
+        entry = self.manifest["sources"].get(name)
+        if entry and entry["hash"] == sourceHash and entry["namespace"] == namespace and entry["loopOptions"] == loopOptions:
+            return entry["functions"]
+
+        return None
+
+    def getSymbols(self, name):
+        return self.manifest["sources"][name]["symbols"]
+
+    def hasAst(self, name, sourceHash):
+        entry = self.manifest["sources"].get(name)
+
+        return entry != None and entry["hash"] == sourceHash and os.path.isfile(self.astPath(name))
+
+    def storeUnit(self, name, sourceHash, namespace, loopOptions, functions, symbols):
+        self.manifest["sources"][name] = {"hash": sourceHash, "namespace": namespace, "loopOptions": loopOptions, "functions": functions, "symbols": symbols}
+
+    def removeUnits(self, names):
+        sources = self.manifest["sources"]
+
+        for name in list(sources):
+            if name not in names:
+                if os.path.isfile(self.astPath(name)):
+                    os.remove(self.astPath(name))
+
+                del sources[name]
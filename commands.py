@@ -0,0 +1,396 @@
+import re
+
+HOLDER_REGEX = re.compile(r"(?<!\S)(\S+ (?:MClangTemp|MClangVars))(?!\S)")
+JSON_HOLDER_REGEX = re.compile(r"\"name\":\"([^\"]+)\",\"objective\":\"(MClangTemp|MClangVars)\"")
+
+INT_MIN = -2 ** 31
+
+class Effects:
+    __slots__ = ("reads", "writes", "kills", "barrier", "renamable")
+
+    def __init__(self):
+        self.reads = set()
+        self.writes = set()
+        self.kills = set()
+
+        self.barrier = False
+        self.renamable = True
+
+def renamed(holder, old, new):
+    return new if holder == old else holder
+
+def isTemp(holder):
+    return holder.endswith(" MClangTemp")
+
+class ScoreSet:
+    __slots__ = ("holder", "value")
+
+    def __init__(self, holder, value):
+        self.holder = holder
+        self.value = value
+
+    def __str__(self):
+        return f"scoreboard players set {self.holder} {self.value}"
+
+    def effects(self):
+        effects = Effects()
+
+        effects.writes.add(self.holder)
+        effects.kills.add(self.holder)
+
+        return effects
+
+    def rename(self, old, new):
+        return ScoreSet(renamed(self.holder, old, new), self.value)
+
+class ScoreAdd:
+    __slots__ = ("holder", "value")
+
+    def __init__(self, holder, value):
+        self.holder = holder
+        self.value = value
+
+    def __str__(self):
+        # add and remove only take 0..2147483647, so INT_MIN has no single-command form
+        if self.value == INT_MIN:
+            raise Exception(f"Cannot add {INT_MIN} to {self.holder} in one command")
+
+        if self.value < 0:
+            return f"scoreboard players remove {self.holder} {-self.value}"
+
+        return f"scoreboard players add {self.holder} {self.value}"
+
+    def effects(self):
+        effects = Effects()
+
+        effects.reads.add(self.holder)
+        effects.writes.add(self.holder)
+
+        return effects
+
+    def rename(self, old, new):
+        return ScoreAdd(renamed(self.holder, old, new), self.value)
+
+class ScoreOperation:
+    __slots__ = ("target", "operation", "source")
+
+    def __init__(self, target, operation, source):
+        self.target = target
+        self.operation = operation
+        self.source = source
+
+    def __str__(self):
+        return f"scoreboard players operation {self.target} {self.operation} {self.source}"
+
+    def effects(self):
+        effects = Effects()
+
+        effects.reads.add(self.source)
+        effects.writes.add(self.target)
+
+        if self.operation == "=":
+            if self.target != self.source:
+                effects.kills.add(self.target)
+        elif self.operation == "><":
+            effects.reads.add(self.target)
+            effects.writes.add(self.source)
+        else:
+            effects.reads.add(self.target)
+
+        return effects
+
+    def rename(self, old, new):
+        return ScoreOperation(renamed(self.target, old, new), self.operation, renamed(self.source, old, new))
+
+class ScoreTest:
+    __slots__ = ("kind", "holder", "relation", "operand")
+
+    def __init__(self, kind, holder, relation, operand):
+        self.kind = kind
+        self.holder = holder
+        self.relation = relation
+        self.operand = operand
+
+    def __str__(self):
+        return f"{self.kind} score {self.holder} {self.relation} {self.operand}"
+
+    def addEffects(self, effects):
+        effects.reads.add(self.holder)
+
+        if self.relation != "matches":
+            effects.reads.add(self.operand)
+
+    def rename(self, old, new):
+        operand = self.operand if self.relation == "matches" else renamed(self.operand, old, new)
+
+        return ScoreTest(self.kind, renamed(self.holder, old, new), self.relation, operand)
+
+class Store:
+    __slots__ = ("kind", "holder")
+
+    def __init__(self, kind, holder):
+        self.kind = kind
+        self.holder = holder
+
+    def __str__(self):
+        return f"store {self.kind} score {self.holder}"
+
+    def addEffects(self, effects):
+        effects.writes.add(self.holder)
+        effects.kills.add(self.holder)
+
+    def rename(self, old, new):
+        return Store(self.kind, renamed(self.holder, old, new))
+
+class StoreData:
+    __slots__ = ("storage", "path")
+
+    def __init__(self, storage, path):
+        self.storage = storage
+        self.path = path
+
+    def __str__(self):
+        return f"store result storage {self.storage} {self.path} int 1"
+
+    def addEffects(self, effects):
+        pass
+
+    def rename(self, old, new):
+        return self
+
+class BlockTest:
+    __slots__ = ("kind", "position", "block")
+
+    def __init__(self, kind, position, block):
+        self.kind = kind
+        self.position = position
+        self.block = block
+
+    def __str__(self):
+        return f"{self.kind} block {' '.join(self.position)} {self.block}"
+
+    def addEffects(self, effects):
+        pass
+
+    def rename(self, old, new):
+        return self
+
+class Execute:
+    __slots__ = ("parts", "run")
+
+    def __init__(self, parts, run = None):
+        self.parts = parts
+        self.run = run
+
+    def __str__(self):
+        text = "execute " + " ".join(str(part) for part in self.parts)
+        if self.run != None:
+            text += f" run {self.run}"
+
+        return text
+
+    def effects(self):
+        effects = Effects()
+
+        for part in self.parts:
+            part.addEffects(effects)
+
+        if self.run != None:
+            inner = self.run.effects()
+
+            # The run part is conditional, so it never fully overwrites a holder
+            effects.reads |= inner.reads | inner.writes
+            effects.writes |= inner.writes
+            effects.barrier = inner.barrier
+            effects.renamable = inner.renamable
+
+        return effects
+
+    def rename(self, old, new):
+        return Execute([part.rename(old, new) for part in self.parts], self.run.rename(old, new) if self.run != None else None)
+
+class Call:
+    __slots__ = ("namespace", "name")
+
+    def __init__(self, namespace, name):
+        self.namespace = namespace
+        self.name = name
+
+    def __str__(self):
+        return f"function {self.namespace}:{self.name}"
+
+    def effects(self):
+        effects = Effects()
+
+        # Generated functions never read the caller's temps, but they may touch any variable
+        effects.barrier = True
+
+        return effects
+
+    def rename(self, old, new):
+        return self
+
+class ScoreGet:
+    __slots__ = ("holder",)
+
+    def __init__(self, holder):
+        self.holder = holder
+
+    def __str__(self):
+        return f"scoreboard players get {self.holder}"
+
+    def effects(self):
+        effects = Effects()
+
+        effects.reads.add(self.holder)
+
+        return effects
+
+    def rename(self, old, new):
+        return ScoreGet(renamed(self.holder, old, new))
+
+class DataGet:
+    __slots__ = ("storage", "path")
+
+    def __init__(self, storage, path):
+        self.storage = storage
+        self.path = path
+
+    def __str__(self):
+        return f"data get storage {self.storage} {self.path}"
+
+    def effects(self):
+        return Effects()
+
+    def rename(self, old, new):
+        return self
+
+class DataSet:
+    __slots__ = ("storage", "path", "value")
+
+    def __init__(self, storage, path, value):
+        self.storage = storage
+        self.path = path
+        self.value = value
+
+    def __str__(self):
+        return f"data modify storage {self.storage} {self.path} set value {self.value}"
+
+    def effects(self):
+        return Effects()
+
+    def rename(self, old, new):
+        return self
+
+class Schedule:
+    __slots__ = ("namespace", "name", "ticks")
+
+    def __init__(self, namespace, name, ticks):
+        self.namespace = namespace
+        self.name = name
+        self.ticks = ticks
+
+    def __str__(self):
+        return f"schedule function {self.namespace}:{self.name} {self.ticks}t replace"
+
+    def effects(self):
+        # The function only runs on a later tick, so nothing in this one depends on it
+        return Effects()
+
+    def rename(self, old, new):
+        return self
+
+class SetBlock:
+    __slots__ = ("position", "block")
+
+    def __init__(self, position, block):
+        self.position = position
+        self.block = block
+
+    def __str__(self):
+        return f"setblock {' '.join(self.position)} {self.block}"
+
+    def effects(self):
+        return Effects()
+
+    def rename(self, old, new):
+        return self
+
+class Fill:
+    __slots__ = ("start", "end", "block")
+
+    def __init__(self, start, end, block):
+        self.start = start
+        self.end = end
+        self.block = block
+
+    def __str__(self):
+        return f"fill {' '.join(self.start)} {' '.join(self.end)} {self.block}"
+
+    def effects(self):
+        return Effects()
+
+    def rename(self, old, new):
+        return self
+
+class Tellraw:
+    __slots__ = ("target", "text", "score")
+
+    def __init__(self, target, text = None, score = None):
+        self.target = target
+        self.text = text
+        self.score = score
+
+    def __str__(self):
+        if self.score != None:
+            name, objective = self.score.split(" ")
+            component = "{\"score\": {\"name\":\"" + name + "\",\"objective\":\"" + objective + "\"}}"
+        elif self.text != None:
+            component = "{\"text\":\"" + self.text + "\"}"
+        else:
+            component = "{}"
+
+        return f"tellraw {self.target} {component}"
+
+    def effects(self):
+        effects = Effects()
+
+        if self.score != None:
+            effects.reads.add(self.score)
+
+        effects.renamable = False
+
+        return effects
+
+    def rename(self, old, new):
+        return self
+
+class Raw:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+    def effects(self):
+        effects = Effects()
+
+        holders = set(HOLDER_REGEX.findall(self.text))
+        for name, objective in JSON_HOLDER_REGEX.findall(self.text):
+            holders.add(name + " " + objective)
+
+        effects.reads = holders
+        effects.writes = set(holders)
+
+        effects.barrier = True
+        effects.renamable = False
+
+        return effects
+
+    def rename(self, old, new):
+        return self
+
+def serialize(commands):
+    return "\n".join(str(command) for command in commands)
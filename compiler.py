@@ -1,31 +1,94 @@
+import sys
+
 from lexer import Token
+from visitor import Visitor
+from commands import ScoreSet, ScoreAdd, ScoreOperation, ScoreTest, ScoreGet, Store, StoreData, DataGet, DataSet, BlockTest, SetBlock, Execute, Call, Schedule, Tellraw, Raw
+from optimizer import wrapInt
+import arrays
 import const
-import os
 
 fileTemplates = {
-    "load.mcfunction": "scoreboard objectives add MClangVars dummy {\"text\": \"MCLang Variables\"}\nscoreboard objectives add MClangTemp dummy {\"text\": \"MCLang Temp\"}\n"
+    "load.mcfunction": [
+        "scoreboard objectives add MClangVars dummy {\"text\": \"MCLang Variables\"}",
+        "scoreboard objectives add MClangTemp dummy {\"text\": \"MCLang Temp\"}"
+    ]
+}
+
+OPERATIONS = {
+    Token.ADD: "+=",
+    Token.SUB: "-=",
+    Token.MUL: "*=",
+    Token.DIV: "/="
+}
+
+COMPARISONS = {
+    Token.EE: ("if", "="),
+    Token.NE: ("unless", "="),
+    Token.LT: ("if", "<"),
+    Token.LTE: ("if", "<="),
+    Token.GT: ("if", ">"),
+    Token.GTE: ("if", ">=")
+}
+
+FLIPPED = {
+    Token.EE: Token.EE,
+    Token.NE: Token.NE,
+    Token.LT: Token.GT,
+    Token.LTE: Token.GTE,
+    Token.GT: Token.LT,
+    Token.GTE: Token.LTE
 }
 
-class Compiler:
-    def __init__(self, projFolder, namespace):
-        self.projFolder = projFolder
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+COMMUTATIVE = (Token.ADD, Token.MUL, Token.EE, Token.NE)
+
+# Up to this many cases are tested one by one, beyond it they are split into a tree of range checks
+SWITCH_LEAF_CASES = 3
+
+# Constant loops up to this many iterations are unrolled, others without a known count stop after maxIterations
+DEFAULT_UNROLL = 8
+DEFAULT_MAX_ITERATIONS = 1000
+
+class LoopOptions:
+    def __init__(self, unroll = DEFAULT_UNROLL, maxIterations = DEFAULT_MAX_ITERATIONS):
+        self.unroll = unroll
+        self.maxIterations = maxIterations
+
+    def key(self):
+        return [self.unroll, self.maxIterations]
+
+def rangeText(low, high):
+    if low == None:
+        return f"..{high}"
+    elif high == None:
+        return f"{low}.."
+    elif low == high:
+        return f"{low}"
+
+    return f"{low}..{high}"
+
+class Compiler(Visitor):
+    def __init__(self, namespace, scope = "main", loopOptions = None):
         self.namespace = namespace
+        self.scope = scope
+        self.loopOptions = loopOptions if loopOptions != None else LoopOptions()
+
+        self.files = {}
 
         self.codeBlocks = []
         self.functions = []
+        self.schedules = {}
+        self.arrays = {}
 
-        self.tempInner = 0
-        self.resultInner = 0
+        # Iterations each loop function runs at most, None when nothing bounds it
+        self.loops = {}
 
-        self.condNot = False
+        self.labels = {}
 
-        self.count = 0
+        self.counts = {}
 
-    def visit(self, node):
-        method = getattr(self, f"visit_{type(node).__name__}", self.noVisitMethod)
-    
-        return method(node)
-    
     def findToken(self, list, token):
         idx = 0
         for item in list:
@@ -36,30 +99,38 @@ class Compiler:
         
         raise ValueError(f"{token} is not in list")
 
-    def noVisitMethod(self, node):
-        raise Exception(f"No visit method defined for {type(node).__name__}")
-    
-    def writeFile(self, name, text):
-        with open(self.projFolder + os.sep + name, "w") as file:
-            if name in fileTemplates:
-                file.write(fileTemplates[name])
-            file.write(text)
+    def writeFile(self, name, commands):
+        if name in fileTemplates:
+            commands = [Raw(text) for text in fileTemplates[name]] + commands
+
+        self.files[name] = commands
 
     def visit_CodeBlockNode(self, node):
         self.codeBlocks.append(node)
 
-        code = ""
+        code = []
         for inst in node.body:
-            code += self.visit(inst)
-            code += "\n"
-        
-        code = code[:-1]
+            code.extend((yield inst))
 
         return code
 
     def visit_FunctionNode(self, node):
         self.functions.append(node.name)
-        code = self.visit(node.body)
+
+        prevScope = self.scope
+        self.scope = node.name.value
+
+        code = yield node.body
+
+        self.scope = prevScope
+
+        if node.schedule != None:
+            kind, ticks = node.schedule
+            self.schedules[node.name.value] = [kind, ticks]
+
+            # Every tick functions go in the tick tag instead, which is cheaper than rescheduling
+            if kind == "every" and ticks > 1:
+                code = [Schedule(self.namespace, node.name.value, ticks)] + code
 
         self.writeFile(f"{node.name.value}.mcfunction", code)
 
@@ -76,113 +147,554 @@ class Compiler:
             funcName = node.value.name.value
             if funcName in const.BUILTINFUNC:
                 if funcName == "print":
-                    comp = "{}"
-                    before = ""
+                    code = []
+                    text = None
+                    score = None
                     if type(node.args[0]).__name__ == "NumberNode":
-                        comp = "{\"text\":\"" + self.visit(node.args[0]) + "\"}"
+                        text = self.visit(node.args[0])
                     elif type(node.args[0]).__name__ == "VarAccessNode":
-                        comp = "{\"score\": {\"name\":\"" + node.args[0].name.value + "\",\"objective\":\"MClangVars\"}}"
-                    elif type(node.args[0]).__name__ == "BinOpNode":
-                        before = self.visit(node.args[0])
-                        comp = "{\"score\": {\"name\":\"a\",\"objective\":\"MClangTemp\"}}"
+                        score = self.visit(node.args[0])
+                    elif type(node.args[0]).__name__ in ("BinOpNode", "UnaryOpNode", "ArrayAccessNode", "CallNode"):
+                        code = self.genExpr(node.args[0], 0)
+                        score = self.temp(0)
                     elif type(node.args[0]).__name__ == "StringNode":
-                        comp = "{\"text\":\"" + self.visit(node.args[0]) + "\"}"
+                        text = self.visit(node.args[0])
                     
                     arg2 = "@a"
                     if len(node.args) > 1:
                         if type(node.args[1]).__name__ == "StringNode":
                             arg2 = self.visit(node.args[1])
-                    return f"{before}\ntellraw {arg2} {comp}"
+
+                    code.append(Tellraw(arg2, text, score))
+
+                    return code
+                elif funcName == "sblock":
+                    return [SetBlock(self.position(node), node.args[3].token.value)]
         else:
-            return f"function {self.namespace}:{node.value.name.value}"
+            return [Call(self.namespace, node.value.name.value)]
     
     def visit_VarAccessNode(self, node):
-        return f"{node.name.value} MClangVars"
+        return self.variable(node.name.value)
     
     def visit_VarAssignNode(self, node):
-        if type(node.value).__name__ == "BinOpNode":
-            self.resultInner = 0
-            return f"{self.visit(node.value)}\nscoreboard players operation {node.name.value} MClangVars = {const.LETTERS[self.resultInner]} MClangTemp"
-        return f"scoreboard players set {node.name.value} MClangVars {self.visit(node.value)}"
+        return self.assignScore(self.variable(node.name.value), node.value)
+
+    def assignScore(self, holder, node):
+        if type(node).__name__ == "NumberNode":
+            return [ScoreSet(holder, node.token.value)]
+        elif type(node).__name__ == "VarAccessNode":
+            return [ScoreOperation(holder, "=", self.visit(node))]
+
+        code = self.genExpr(node, 0)
+        code.append(ScoreOperation(holder, "=", self.temp(0)))
+
+        return code
     
     def visit_UnaryOpNode(self, node):
-        if node.operation.matches(Token.NOT):
-            self.condNot = True
-            return self.visit(node.value)
-        elif node.operation.matches(Token.SUB):
-            return f"-{self.visit(node.value)}"
+        return self.genExpr(node, 0)
+
+    def position(self, node):
+        return tuple(f"{arg.token.value}" for arg in node.args[:3])
+
+    def isBlockTest(self, node):
+        return type(node).__name__ == "CallNode" and node.value.name.value == "gblock"
+
+    def visit_ArrayNode(self, node):
+        self.arrays[node.name.value] = node.size
+
+        return []
+
+    def visit_ArrayAssignNode(self, node):
+        name = node.name.value
+        storage = arrays.storage(self.namespace)
+
+        index = self.constantIndex(node)
+        if index != None:
+            if self.isIntLiteral(node.value):
+                return [DataSet(storage, arrays.path(name, index), node.value.token.value)]
+
+            code = []
+
+            operand = self.directOperand(node.value)
+            if operand == None:
+                code = self.genExpr(node.value, 0)
+                operand = self.temp(0)
+
+            code.append(Execute([StoreData(storage, arrays.path(name, index))], ScoreGet(operand)))
+
+            return code
+
+        # The index may read other arrays, which reuses the value holder, so the value waits in a temp
+        steps = []
+
+        operand = self.directOperand(node.value)
+        if operand == None and not self.isIntLiteral(node.value):
+            steps.append((node.value, 0))
+            operand = self.temp(0)
+
+        steps.extend(self.planIndex(node.index, 1))
+
+        if operand == None:
+            steps.append(ScoreSet(arrays.VALUE, node.value.token.value))
+        else:
+            steps.append(ScoreOperation(arrays.VALUE, "=", operand))
+
+        steps.append(Call(self.namespace, arrays.setFunction(name)))
+
+        return self.genSteps(steps)
+
+    def constantIndex(self, node):
+        if self.isIntLiteral(node.index) and 0 <= node.index.token.value < node.size:
+            return node.index.token.value
+
+        return None
+
+    def planIndex(self, node, base):
+        operand = self.directOperand(node)
+        if operand != None:
+            return [ScoreOperation(arrays.INDEX, "=", operand)]
+
+        return [(node, base), ScoreOperation(arrays.INDEX, "=", self.temp(base))]
 
     def visit_IfNode(self, node):
-        self.count += 1
-        fileName = f"if_{self.count}"
+        count = self.counts.get(self.scope, 0) + 1
+        self.counts[self.scope] = count
+
+        fileName = f"{self.scope}_if_{count}"
         
-        self.writeFile(fileName + ".mcfunction", self.visit(node.body))
+        self.writeFile(fileName + ".mcfunction", (yield node.body))
 
-        return f"{self.visit(node.cond)} run function {self.namespace}:{fileName}"
+        code, test = self.genCondition(node.cond)
+        code.append(Execute([test], Call(self.namespace, fileName)))
+
+        return code
 
     def visit_BinOpNode(self, node):
-        signOp = ""
-        exType = ""
-        opType = "expr"
-
-        code = ""
-
-        if node.operation.matches(Token.ADD):
-            signOp = "+="
-            opType = "expr"
-        elif node.operation.matches(Token.SUB):
-            signOp = "-="
-            opType = "expr"
-        elif node.operation.matches(Token.MUL):
-            signOp = "*="
-            opType = "expr"
-        elif node.operation.matches(Token.DIV):
-            signOp = "/="
-            opType = "expr"
-        elif node.operation.matches(Token.EE):
-            signOp = "="
-            exType = "if"
-            opType = "comp"
-        elif node.operation.matches(Token.NE):
-            signOp = "="
-            exType = "unless"
-            opType = "comp"
-        
-        if self.condNot:
-            if exType == "unless":
-                exType = "if"
+        return self.genExpr(node, 0)
+
+    def loopName(self, kind):
+        key = (self.scope, kind)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+
+        return f"{self.scope}_{kind}_{count}"
+
+    def genLoop(self, name, setup, body, condition, iterations):
+        # Loops without a known count get a countdown, so a runaway loop ends instead of hitting maxCommandChainLength
+        guard = None
+        if iterations == None and self.loopOptions.maxIterations:
+            iterations = self.loopOptions.maxIterations
+            guard = sys.intern(f"#{name} MClangVars")
+
+            setup.append(ScoreSet(guard, iterations))
+            body.append(ScoreAdd(guard, -1))
+
+        self.loops[name] = iterations
+
+        # The test is repeated at the end of the body, so the loop function calls itself once per iteration
+        for code in (setup, body):
+            steps, test = condition()
+
+            tests = [test] if test != None else []
+            if guard != None and code is body:
+                tests.insert(0, ScoreTest("if", guard, "matches", "1.."))
+
+            code.extend(steps)
+            code.append(Execute(tests, Call(self.namespace, name)) if tests else Call(self.namespace, name))
+
+        self.writeFile(name + ".mcfunction", body)
+
+        return setup
+
+    def visit_WhileNode(self, node):
+        name = self.loopName("while")
+        body = yield node.body
+
+        # A constant true condition has nothing to test, so only the countdown ends the loop
+        if type(node.cond).__name__ == "NumberNode" and node.cond.token.value:
+            return self.genLoop(name, [], body, lambda: ([], None), None)
+
+        return self.genLoop(name, [], body, lambda: self.genCondition(node.cond), None)
+
+    def visit_ForNode(self, node):
+        name = self.loopName("for")
+        body = yield node.body
+
+        variable = self.variable(node.name.value)
+        step = node.step
+
+        count = None
+        if self.isIntLiteral(node.first) and self.isIntLiteral(node.last):
+            first = node.first.token.value
+            count = max(0, (node.last.token.value - first) // step + 1)
+
+            if count <= self.loopOptions.unroll:
+                code = []
+                for idx in range(count):
+                    code.append(ScoreSet(variable, first + idx * step))
+                    code.extend(body)
+
+                # The variable ends one step past the last value, as it does when the loop is not unrolled
+                code.append(ScoreSet(variable, wrapInt(first + count * step)))
+
+                return code
+
+        relation = "<=" if step > 0 else ">="
+
+        if self.isIntLiteral(node.last):
+            last = node.last.token.value
+            test = ScoreTest("if", variable, "matches", f"..{last}" if step > 0 else f"{last}..")
+            setup = []
+        else:
+            # The bound is read once, like the start, so the body cannot move it
+            last = sys.intern(f"#{name}_last MClangVars")
+            test = ScoreTest("if", variable, relation, last)
+            setup = self.assignScore(last, node.last)
+
+        setup.extend(self.assignScore(variable, node.first))
+        body.append(ScoreAdd(variable, step))
+
+        return self.genLoop(name, setup, body, lambda: ([], test), count)
+
+    def visit_SwitchNode(self, node):
+        key = (self.scope, "switch")
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+
+        prefix = f"{self.scope}_switch_{count}"
+
+        # Case bodies may change the subject, so it is copied to a holder only this switch writes
+        holder = sys.intern(f"#{prefix} MClangVars")
+
+        operand = self.directOperand(node.subject)
+        if operand != None:
+            code = [ScoreOperation(holder, "=", operand)]
+        else:
+            code = self.genExpr(node.subject, 0)
+            code.append(ScoreOperation(holder, "=", self.temp(0)))
+
+        entries = []
+        for idx, case in enumerate(node.cases):
+            name = f"{prefix}_case_{idx + 1}"
+            self.writeFile(name + ".mcfunction", (yield case.body))
+
+            for value in case.values:
+                entries.append((value, name))
+
+        default = None
+        if node.default != None:
+            default = f"{prefix}_default"
+            self.writeFile(default + ".mcfunction", (yield node.default))
+
+        # Consecutive values that share a body become one range test
+        groups = []
+        for value, name in sorted(entries):
+            if groups and groups[-1][2] == name and groups[-1][1] == value - 1:
+                groups[-1][1] = value
             else:
-                exType = "unless"
-
-        if type(node.left).__name__ == "NumberNode":
-            code += f"scoreboard players set {const.LETTERS[self.tempInner]} MClangTemp {self.visit(node.left)}\n"
-        elif type(node.left).__name__ == "VarAccessNode":
-            code += f"scoreboard players operation {const.LETTERS[self.tempInner]} MClangTemp = {self.visit(node.left)}\n"
-        elif type(node.left).__name__ == "BinOpNode":
-            self.tempInner += 1
-            self.resultInner += 1
-            code += f"{self.visit(node.left)}\n"
-
-        if type(node.right).__name__ == "NumberNode":
-            code += f"scoreboard players set {const.LETTERS[self.tempInner + 1]} MClangTemp {self.visit(node.right)}\n"
-            if opType == "expr":
-                code += f"scoreboard players operation {const.LETTERS[self.tempInner]} MClangTemp {signOp} {const.LETTERS[self.tempInner + 1]} MClangTemp\n"
-        elif type(node.right).__name__ == "VarAccessNode":
-            code += f"scoreboard players operation {const.LETTERS[self.tempInner]} MClangTemp = {self.visit(node.right)}\n"
-        elif type(node.right).__name__ == "BinOpNode":
-            self.tempInner += 1
-            self.resultInner += 1
-            code += f"{self.visit(node.right)}\n"
-            if opType == "expr":
-                code += f"scoreboard players operation {const.LETTERS[self.resultInner]} MClangTemp {signOp} {const.LETTERS[self.tempInner]} MClangTemp\n"
-        
-        if opType == "comp" and self.tempInner <= 0:
-            code += f"execute {exType} score {const.LETTERS[self.tempInner]} MClangTemp {signOp} {const.LETTERS[self.tempInner + 1]} MClangTemp"
+                groups.append([value, value, name])
 
-        if code.endswith("\n"):
-            code = code[:-1]
+        if not groups:
+            if default != None:
+                code.append(Call(self.namespace, default))
 
-        if self.tempInner > 0:
-            self.tempInner -= 1
-        
-        return code
\ No newline at end of file
+            return code
+
+        # With a default every node covers a slice of the whole integer range, without one the tightest range is enough
+        nodes = 0
+        stack = [(code, 0, len(groups), None, None)]
+
+        while stack:
+            target, start, end, low, high = stack.pop()
+
+            if end - start <= SWITCH_LEAF_CASES:
+                for first, last, name in groups[start:end]:
+                    target.append(Execute([ScoreTest("if", holder, "matches", rangeText(first, last))], Call(self.namespace, name)))
+
+                if default != None:
+                    tests = [ScoreTest("unless", holder, "matches", rangeText(first, last)) for first, last, name in groups[start:end]]
+                    target.append(Execute(tests, Call(self.namespace, default)))
+
+                continue
+
+            middle = (start + end) // 2
+            split = groups[middle - 1][1]
+
+            for childStart, childEnd, childLow, childHigh in ((start, middle, low, split), (middle, end, split + 1, high)):
+                if default == None:
+                    childLow, childHigh = groups[childStart][0], groups[childEnd - 1][1]
+
+                nodes += 1
+                name = f"{prefix}_{nodes}"
+
+                lines = []
+                target.append(Execute([ScoreTest("if", holder, "matches", rangeText(childLow, childHigh))], Call(self.namespace, name)))
+
+                self.writeFile(name + ".mcfunction", lines)
+                stack.append((lines, childStart, childEnd, childLow, childHigh))
+
+        return code
+
+    def tempName(self, reg):
+        # Score holders are unbounded, so registers past the single letters spill to numbered names
+        if reg < len(const.LETTERS):
+            return const.LETTERS[reg]
+
+        return f"t{reg}"
+
+    def temp(self, reg):
+        return sys.intern(f"{self.tempName(reg)} MClangTemp")
+
+    def variable(self, name):
+        # Every command keeps its own holder strings, so interning keeps large functions small
+        return sys.intern(f"{name} MClangVars")
+
+    def directOperand(self, node):
+        if type(node).__name__ == "VarAccessNode":
+            return self.visit(node)
+
+        return None
+
+    def children(self, node):
+        nodeType = type(node).__name__
+
+        if nodeType == "BinOpNode":
+            return (node.left, node.right)
+        elif nodeType == "UnaryOpNode":
+            return (node.value,)
+        elif nodeType == "ArrayAccessNode":
+            return (node.index,)
+
+        return ()
+
+    def label(self, node):
+        if id(node) in self.labels:
+            return self.labels[id(node)]
+
+        # Children are labelled before their parent, so nodeLabel only ever reads finished labels
+        stack = [(node, False)]
+        while stack:
+            item, ready = stack.pop()
+
+            if id(item) in self.labels:
+                continue
+
+            if ready:
+                self.labels[id(item)] = self.nodeLabel(item)
+            else:
+                stack.append((item, True))
+                for child in self.children(item):
+                    stack.append((child, False))
+
+        return self.labels[id(node)]
+
+    def nodeLabel(self, node):
+        nodeType = type(node).__name__
+        if nodeType == "BinOpNode" and node.operation.type in COMPARISONS or nodeType == "UnaryOpNode" and node.operation.matches(Token.NOT):
+            return max(self.conditionLabel(node), 1)
+        elif nodeType == "BinOpNode":
+            return self.operandsLabel(node)
+        elif nodeType == "UnaryOpNode":
+            if self.directOperand(node.value) != None:
+                return 1
+
+            return self.label(node.value) + 1
+        elif nodeType == "ArrayAccessNode":
+            # The index is computed in the same register the element is loaded into
+            return self.label(node.index)
+
+        return 1
+
+    def operandsLabel(self, node):
+        leftLabel = self.label(node.left)
+
+        if self.directOperand(node.right) != None:
+            return leftLabel
+
+        rightLabel = self.label(node.right)
+
+        if leftLabel >= rightLabel:
+            return max(leftLabel, rightLabel + 1)
+
+        # Either order works from here, commutative or not, so the deeper right side sets the count
+        return rightLabel
+
+    def conditionLabel(self, node):
+        while type(node).__name__ == "UnaryOpNode" and node.operation.matches(Token.NOT):
+            node = node.value
+
+        if type(node).__name__ == "BinOpNode" and node.operation.type in COMPARISONS:
+            left, operation, right = self.orientComparison(node)
+
+            if self.matchRange(operation, right) != None or self.directOperand(right) != None:
+                return 0 if self.directOperand(left) != None else self.label(left)
+            elif self.directOperand(left) != None:
+                return self.label(right)
+
+            return self.operandsLabel(node)
+
+        return 0 if self.directOperand(node) != None or self.isBlockTest(node) else self.label(node)
+
+    def planOperands(self, node, base):
+        right = self.directOperand(node.right)
+        if right != None:
+            return [(node.left, base)], self.temp(base), right
+
+        leftLabel = self.label(node.left)
+        rightLabel = self.label(node.right)
+
+        if leftLabel >= rightLabel:
+            return [(node.left, base), (node.right, base + 1)], self.temp(base), self.temp(base + 1)
+        elif node.operation.type in COMMUTATIVE:
+            return [(node.right, base), (node.left, base + 1)], self.temp(base), self.temp(base + 1)
+
+        # The right side is the deeper one, so it goes first into base and the left side is computed above it
+        return [(node.right, base), (node.left, base + 1)], self.temp(base + 1), self.temp(base)
+
+    def planExpr(self, node, base):
+        nodeType = type(node).__name__
+        target = self.temp(base)
+
+        if nodeType == "NumberNode":
+            return [ScoreSet(target, node.token.value)]
+        elif nodeType == "VarAccessNode":
+            return [ScoreOperation(target, "=", self.visit(node))]
+        elif nodeType == "BinOpNode" and node.operation.type in COMPARISONS or nodeType == "UnaryOpNode" and node.operation.matches(Token.NOT):
+            steps, test = self.planCondition(node, base)
+            steps.append(Execute([Store("success", target), test]))
+
+            return steps
+        elif nodeType == "UnaryOpNode":
+            operand = self.directOperand(node.value)
+
+            steps = []
+            if operand == None:
+                steps = [(node.value, base + 1)]
+                operand = self.temp(base + 1)
+
+            steps.append(ScoreSet(target, 0))
+            steps.append(ScoreOperation(target, "-=", operand))
+
+            return steps
+        elif self.isBlockTest(node):
+            return [Execute([Store("success", target), BlockTest("if", self.position(node), node.args[3].token.value)])]
+        elif nodeType == "ArrayAccessNode":
+            name = node.name.value
+
+            index = self.constantIndex(node)
+            if index != None:
+                return [Execute([Store("result", target)], DataGet(arrays.storage(self.namespace), arrays.path(name, index)))]
+
+            steps = self.planIndex(node.index, base)
+            steps.append(Call(self.namespace, arrays.getFunction(name)))
+            steps.append(ScoreOperation(target, "=", arrays.VALUE))
+
+            return steps
+        elif nodeType == "BinOpNode":
+            steps, left, right = self.planOperands(node, base)
+            steps.append(ScoreOperation(left, OPERATIONS[node.operation.type], right))
+
+            if left != target:
+                steps.append(ScoreOperation(target, "=", left))
+
+            return steps
+
+        raise Exception(f"Cannot compute {nodeType} into a score")
+
+    def genSteps(self, steps):
+        # A step is either a finished command or a (node, register) pair that still has to be planned
+        code = []
+
+        stack = list(reversed(steps))
+        while stack:
+            step = stack.pop()
+
+            if isinstance(step, tuple):
+                stack.extend(reversed(self.planExpr(*step)))
+            else:
+                code.append(step)
+
+        return code
+
+    def genExpr(self, node, base):
+        return self.genSteps([(node, base)])
+
+    def isIntLiteral(self, node):
+        return type(node).__name__ == "NumberNode" and node.token.type == Token.INT
+
+    def orientComparison(self, node):
+        if self.isIntLiteral(node.left) and not self.isIntLiteral(node.right):
+            return node.right, FLIPPED[node.operation.type], node.left
+
+        return node.left, node.operation.type, node.right
+
+    def matchRange(self, operation, node):
+        if not self.isIntLiteral(node):
+            return None
+
+        value = node.token.value
+
+        if operation in (Token.EE, Token.NE):
+            return f"{value}"
+        elif operation == Token.LT and value > INT_MIN:
+            return f"..{value - 1}"
+        elif operation == Token.LTE:
+            return f"..{value}"
+        elif operation == Token.GT and value < INT_MAX:
+            return f"{value + 1}.."
+        elif operation == Token.GTE:
+            return f"{value}.."
+
+        return None
+
+    def genCondition(self, node, base = 0, negate = False):
+        steps, test = self.planCondition(node, base, negate)
+
+        return self.genSteps(steps), test
+
+    def planCondition(self, node, base = 0, negate = False):
+        while type(node).__name__ == "UnaryOpNode" and node.operation.matches(Token.NOT):
+            node = node.value
+            negate = not negate
+
+        nodeType = type(node).__name__
+
+        if nodeType == "BinOpNode" and node.operation.type in COMPARISONS:
+            left, operation, right = self.orientComparison(node)
+
+            exType, sign = COMPARISONS[operation]
+            if negate:
+                exType = "if" if exType == "unless" else "unless"
+
+            leftOperand = self.directOperand(left)
+            rightOperand = self.directOperand(right)
+
+            matchRange = self.matchRange(operation, right)
+            if matchRange != None or rightOperand != None:
+                steps = []
+                if leftOperand == None:
+                    steps = [(left, base)]
+                    leftOperand = self.temp(base)
+
+                if matchRange != None:
+                    return steps, ScoreTest(exType, leftOperand, "matches", matchRange)
+
+                return steps, ScoreTest(exType, leftOperand, sign, rightOperand)
+            elif leftOperand != None:
+                return [(right, base)], ScoreTest(exType, leftOperand, sign, self.temp(base))
+
+            steps, leftOperand, rightOperand = self.planOperands(node, base)
+
+            return steps, ScoreTest(exType, leftOperand, COMPARISONS[node.operation.type][1], rightOperand)
+
+        # The block is tested in place, so the condition needs no temporary
+        if self.isBlockTest(node):
+            return [], BlockTest("unless" if negate else "if", self.position(node), node.args[3].token.value)
+
+        operand = self.directOperand(node)
+        steps = []
+        if operand == None:
+            steps = [(node, base)]
+            operand = self.temp(base)
+
+        return steps, ScoreTest("if" if negate else "unless", operand, "matches", "0")
@@ -3,7 +3,8 @@ import string
 DIGITS = "0123456789"
 LETTERS = string.ascii_letters
 
-KEYWORDS = ["func", "if"]
+# every, after, case and default are only special in one position each, so the parser matches them as identifiers there
+KEYWORDS = ["func", "if", "array", "switch", "while", "for"]
 BUILTINFUNC = ["print", "sblock", "gblock"]
 
 QUOTES = "\"\'"
\ No newline at end of file
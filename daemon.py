@@ -0,0 +1,173 @@
+import contextlib
+import io
+import json
+import os
+import selectors
+import socket
+import sys
+import time
+
+from diagnostics import messageInfo
+
+# Clients send one command per line and get the build's output followed by a result line
+COMMANDS = ("build", "stop")
+
+class Daemon:
+    def __init__(self, project, interval = 0.1, socketPath = None):
+        self.project = project
+        self.interval = interval
+        self.socketPath = socketPath
+
+        self.selector = selectors.DefaultSelector()
+        self.server = None
+        self.buffers = {}
+
+        self.running = False
+
+    def snapshot(self):
+        stamps = {}
+
+        folders = [self.project.srcPath]
+        while folders:
+            with os.scandir(folders.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        folders.append(entry.path)
+                    elif entry.name.endswith(".mclang") or entry.name == "config.cfg":
+                        stat = entry.stat()
+                        stamps[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+        return stamps
+
+    def rebuild(self):
+        start = time.perf_counter()
+
+        stream = io.StringIO()
+        with contextlib.redirect_stdout(stream):
+            try:
+                ok = self.project.build()
+            except Exception as exception:
+                # A broken config or an internal error fails this build, not the daemon
+                self.project.diagnostics.error(messageInfo("setup", f"{type(exception).__name__}: {exception}"))
+                ok = False
+
+        result = {"type": "build", "ok": ok, "milliseconds": (time.perf_counter() - start) * 1000}
+
+        text = stream.getvalue()
+        if self.project.options.verbose:
+            text += f"Build {'finished' if ok else 'failed'} in {result['milliseconds']:.1f} ms\n"
+        else:
+            text += json.dumps(result) + "\n"
+
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+        return text
+
+    def listen(self):
+        if os.path.exists(self.socketPath):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socketPath)
+            except OSError:
+                os.remove(self.socketPath)
+            else:
+                raise OSError(f"A daemon is already listening on {self.socketPath}")
+            finally:
+                probe.close()
+
+        folder = os.path.dirname(os.path.abspath(self.socketPath))
+        os.makedirs(folder, exist_ok = True)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socketPath)
+        self.server.listen()
+        self.server.setblocking(False)
+
+        self.selector.register(self.server, selectors.EVENT_READ)
+
+    def accept(self):
+        connection, address = self.server.accept()
+        connection.setblocking(False)
+
+        self.buffers[connection] = b""
+        self.selector.register(connection, selectors.EVENT_READ)
+
+    def close(self, connection):
+        self.selector.unregister(connection)
+        del self.buffers[connection]
+
+        connection.close()
+
+    def receive(self, connection):
+        try:
+            data = connection.recv(4096)
+        except OSError:
+            data = b""
+
+        if not data:
+            self.close(connection)
+            return
+
+        self.buffers[connection] += data
+        while b"\n" in self.buffers[connection]:
+            line, self.buffers[connection] = self.buffers[connection].split(b"\n", 1)
+            command = line.decode(errors = "replace").strip()
+
+            if command == "build":
+                reply = self.rebuild()
+            elif command == "stop":
+                reply = json.dumps({"type": "stopped"}) + "\n"
+                self.running = False
+            else:
+                reply = json.dumps({"type": "error", "message": f"Unknown command {command!r}, expected one of {', '.join(COMMANDS)}"}) + "\n"
+
+            try:
+                connection.setblocking(True)
+                connection.sendall(reply.encode())
+                connection.setblocking(False)
+            except OSError:
+                self.close(connection)
+                return
+
+    def run(self):
+        if self.socketPath != None:
+            self.listen()
+
+        self.running = True
+
+        try:
+            stamps = self.snapshot()
+            self.rebuild()
+
+            while self.running:
+                if self.server != None:
+                    events = self.selector.select(self.interval)
+                else:
+                    time.sleep(self.interval)
+                    events = []
+
+                for key, mask in events:
+                    if key.fileobj == self.server:
+                        self.accept()
+                    else:
+                        self.receive(key.fileobj)
+
+                current = self.snapshot()
+                if current != stamps:
+                    stamps = current
+                    self.rebuild()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for connection in list(self.buffers):
+                self.close(connection)
+
+            if self.server != None:
+                self.selector.unregister(self.server)
+                self.server.close()
+
+                if os.path.exists(self.socketPath):
+                    os.remove(self.socketPath)
+
+            self.selector.close()
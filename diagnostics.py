@@ -0,0 +1,62 @@
+import json
+
+def errorInfo(phase, error):
+    ln, col = error.source.lineCol(error.start)
+
+    message = error.errName
+    if error.details:
+        message += f": {error.details}"
+
+    return {"phase": phase, "file": error.source.fn, "line": ln + 1, "column": col + 1, "message": message, "text": str(error)}
+
+def messageInfo(phase, message, file = None):
+    return {"phase": phase, "file": file, "line": None, "column": None, "message": message, "text": message}
+
+class Diagnostics:
+    def __init__(self, verbose = False, stream = None, project = None):
+        self.verbose = verbose
+
+        # Batch builds give every project its own stream and tag its records, so output from parallel builds stays apart
+        self.stream = stream
+        self.project = project
+
+        self.errors = 0
+        self.warnings = 0
+
+    def write(self, text):
+        print(text, file = self.stream)
+
+    def emit(self, record):
+        if self.project != None:
+            record["project"] = self.project
+
+        self.write(json.dumps(record))
+
+    def record(self, severity, info):
+        record = {"type": "diagnostic", "severity": severity, "phase": info["phase"], "message": info["message"]}
+        for key in ("file", "line", "column"):
+            if info.get(key) != None:
+                record[key] = info[key]
+
+        return record
+
+    def debug(self, text):
+        if self.verbose:
+            self.write(text)
+
+    def warning(self, info):
+        self.warnings += 1
+
+        if self.verbose:
+            self.write(f"Warning: {info['text']}")
+        else:
+            self.emit(self.record("warning", info))
+
+    def error(self, info):
+        self.errors += 1
+
+        if self.verbose:
+            self.write(f"An error occured during {info['phase']}.")
+            self.write(info["text"])
+        else:
+            self.emit(self.record("error", info))
@@ -2,20 +2,18 @@ class Error:
     ILLEGAL_CHAR = "Illegal Character"
     INVALID_SYNTAX = "Invalid Syntax"
 
-    def __init__(self, posRange, errName, details = None):
+    def __init__(self, span, errName, details = None):
         self.errName = errName
         self.details = details
 
-        newPosRange = []
-        for pos in posRange:
-            newPosRange.append(pos.copy())
+        self.source = span.source
+        self.start = span.start
+        self.end = span.end
 
-        self.posRange = posRange
-        if len(self.posRange) < 2 or self.posRange[1] == None:
-            self.posRange.append(self.posRange[0])
-    
     def __str__(self):
-        result = f"At {self.posRange[0].fn}, line {self.posRange[0].ln + 1}:\n{self.posRange[0].ftxt.split("\n")[self.posRange[0].ln]}\n{self.errName}"
+        ln = self.source.lineCol(self.start)[0]
+
+        result = f"At {self.source.fn}, line {ln + 1}:\n{self.source.line(ln)}\n{self.errName}"
         if self.details:
             result += f": {self.details}"
 
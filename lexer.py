@@ -1,3 +1,5 @@
+import re
+
 import const
 import error
 import position
@@ -11,6 +13,10 @@ class Token:
     EQ = "EQ"
     EE = "EE"
     NE = "NE"
+    LT = "LT"
+    LTE = "LTE"
+    GT = "GT"
+    GTE = "GTE"
 
     NOT = "NOT"
 
@@ -29,23 +35,18 @@ class Token:
     RPAREN = "RPAREN"
     LCURLY = "LCURLY"
     RCURLY = "RCURLY"
+    LSQUARE = "LSQUARE"
+    RSQUARE = "RSQUARE"
+
+    __slots__ = ("type", "value", "source", "start", "end")
 
-    def __init__(self, posRange, type, value = None):
+    def __init__(self, source, start, end, type, value = None):
         self.type = type
         self.value = value
 
-        newPosRange = []
-        for pos in posRange:
-            newPosRange.append(pos.copy())
-
-        self.posRange = newPosRange
-        if len(self.posRange) < 2 or self.posRange[1] == None:
-            self.posRange.append(self.posRange[0].copy())
-            
-            try:
-                self.posRange[1].advance(self.posRange[1].ftxt[self.posRange[1].idx])
-            except:
-                pass
+        self.source = source
+        self.start = start
+        self.end = end
     
     def matches(self, type, value = None):
         if value: return self.type == type and self.value == value
@@ -57,155 +58,120 @@ class Token:
         else:
             return f"({self.type})"
 
+SINGLE_CHARS = {
+    "+": Token.ADD,
+    "-": Token.SUB,
+    "*": Token.MUL,
+    "/": Token.DIV,
+    "(": Token.LPAREN,
+    ")": Token.RPAREN,
+    "{": Token.LCURLY,
+    "}": Token.RCURLY,
+    "[": Token.LSQUARE,
+    "]": Token.RSQUARE,
+    ",": Token.COMMA
+}
+
+def charClass(chars):
+    return "[" + re.escape(chars) + "]"
+
+TOKEN_PATTERN = "|".join([
+    r"(?P<SKIP>[ \t\n]+)",
+    r"(?P<COMMENT>#[^\n]*)",
+    "(?P<NUMBER>" + charClass(const.DIGITS) + r"+(?:\." + charClass(const.DIGITS) + "*)?)",
+    "(?P<IDENTIFIER>" + charClass(const.LETTERS) + charClass(const.LETTERS + "_") + "*)",
+    "(?P<STRING>" + charClass(const.QUOTES) + r"(?P<STRINGBODY>(?:\\.|[^\\" + re.escape(const.QUOTES) + "])*)" + charClass(const.QUOTES) + "?)",
+    r"(?P<EQUALS>==?)",
+    r"(?P<NOT>!=?)",
+    r"(?P<LESS><=?)",
+    r"(?P<GREATER>>=?)",
+    "(?P<SINGLE>" + charClass("".join(SINGLE_CHARS)) + ")"
+])
+
+TOKEN_REGEX = re.compile(TOKEN_PATTERN, re.DOTALL)
+BYTES_TOKEN_REGEX = re.compile(TOKEN_PATTERN.encode(), re.DOTALL)
+
+ESCAPE_REGEX = re.compile(r"\\(.)", re.DOTALL)
+
 class Lexer:
     def __init__(self, fn, code):
         self.fn = fn
         self.code = code
-        
-        self.pos = position.Position(-1, 0, -1, fn, self.code)
-        self.currentChar = None
 
-        self.advance()
-    
-    def advance(self):
-        self.pos.advance(self.currentChar)
-        self.currentChar = self.code[self.pos.idx] if self.pos.idx < len(self.code) else None
+        self.source = position.SourceFile(fn, code)
+        self.error = None
     
     def lex(self):
-        tokens = []
-
-        while self.currentChar != None:
-            if self.currentChar in " \t\n":
-                self.advance()
-            elif self.currentChar in const.DIGITS:
-                tokens.append(self.makeNumber())
-            elif self.currentChar in const.LETTERS:
-                tokens.append(self.makeIdentifier())
-            elif self.currentChar == "+":
-                tokens.append(Token([self.pos], Token.ADD))
-                self.advance()
-            elif self.currentChar == "-":
-                tokens.append(Token([self.pos], Token.SUB))
-                self.advance()
-            elif self.currentChar == "*":
-                tokens.append(Token([self.pos], Token.MUL))
-                self.advance()
-            elif self.currentChar == "/":
-                tokens.append(Token([self.pos], Token.DIV))
-                self.advance()
-            elif self.currentChar == "(":
-                tokens.append(Token([self.pos], Token.LPAREN))
-                self.advance()
-            elif self.currentChar == ")":
-                tokens.append(Token([self.pos], Token.RPAREN))
-                self.advance()
-            elif self.currentChar == "{":
-                tokens.append(Token([self.pos], Token.LCURLY))
-                self.advance()
-            elif self.currentChar == "}":
-                tokens.append(Token([self.pos], Token.RCURLY))
-                self.advance()
-            elif self.currentChar == ",":
-                tokens.append(Token([self.pos], Token.COMMA))
-                self.advance()
-            elif self.currentChar in const.QUOTES:
-                tokens.append(self.makeString())
-            elif self.currentChar == "#":
-                while self.currentChar != "\n":
-                    self.advance()
-            elif self.currentChar == "=":
-                tokens.append(self.makeEquals())
-            elif self.currentChar == "!":
-                tokens.append(self.makeNotEquals())
-            else:
-                posStart = self.pos.copy()
-                char = self.currentChar
-                self.advance()
-
-                return [], error.Error([posStart], error.Error.ILLEGAL_CHAR, f"\"{char}\"")
-
-        tokens.append(Token([self.pos], Token.EOF))
+        tokens = list(self.stream())
 
-        return tokens, None
-    
-    def makeNumber(self):
-        numStr = ""
-        dots = 0
-
-        startPos = self.pos.copy()
-
-        while self.currentChar != None and self.currentChar in const.DIGITS + ".":
-            if self.currentChar == ".":
-                if dots >= 1:
-                    break
-
-                dots += 1
-                numStr += self.currentChar
-            else:
-                numStr += self.currentChar
-            
-            self.advance()
-            
-        if dots <= 0:
-            return Token([startPos, self.pos], Token.INT, int(numStr))
-        else:
-            return Token([startPos, self.pos], Token.FLOAT, float(numStr))
-
-    def makeIdentifier(self):
-        idenStr = ""
-
-        startPos = self.pos.copy()
+        if self.error:
+            return [], self.error
 
-        while self.currentChar != None and self.currentChar in const.LETTERS + "_":
-            idenStr += self.currentChar
-            
-            self.advance()
-            
-        if idenStr in const.KEYWORDS:
-            return Token([startPos, self.pos], Token.KEYWORD, idenStr)
-        else:
-            return Token([startPos, self.pos], Token.IDENTIFIER, idenStr)
-    
-    def makeEquals(self):
-        tokenType = Token.EQ
-
-        startPos = self.pos.copy()
-
-        self.advance()
-        if self.currentChar == "=":
-            tokenType = Token.EE
-            self.advance()
-        
-        return Token([startPos, self.pos], tokenType)
-
-    def makeNotEquals(self):
-        tokenType = Token.NOT
-
-        startPos = self.pos.copy()
-
-        self.advance()
-        if self.currentChar == "=":
-            tokenType = Token.NE
-            self.advance()
-        
-        return Token([startPos, self.pos], tokenType)
-
-    def makeString(self):
-        curStr = ""
-
-        startPos = self.pos.copy()
-
-        self.advance()
-
-        while self.currentChar != None and self.currentChar not in const.QUOTES:
-            if self.currentChar == "\\":
-                self.advance()
-                curStr += self.currentChar
-            else:
-                curStr += self.currentChar
-            
-            self.advance()
-            
-        self.advance()
+        return tokens, None
 
-        return Token([startPos, self.pos], Token.STRING, curStr)
\ No newline at end of file
+    def stream(self):
+        code = self.code
+        source = self.source
+
+        binary = not isinstance(code, str)
+        match = BYTES_TOKEN_REGEX.match if binary else TOKEN_REGEX.match
+
+        idx = 0
+        length = len(code)
+
+        while idx < length:
+            result = match(code, idx)
+
+            if result == None:
+                char = code[idx:idx + 1]
+                if binary:
+                    char = char.decode(errors = "replace")
+
+                self.error = error.Error(position.Position(source, idx, idx + 1), error.Error.ILLEGAL_CHAR, f"\"{char}\"")
+                break
+
+            kind = result.lastgroup
+            end = result.end()
+
+            if kind == "IDENTIFIER":
+                text = result.group()
+                if binary:
+                    text = text.decode()
+
+                if text in const.KEYWORDS:
+                    yield Token(source, idx, end, Token.KEYWORD, text)
+                else:
+                    yield Token(source, idx, end, Token.IDENTIFIER, text)
+            elif kind == "SINGLE":
+                text = result.group()
+                if binary:
+                    text = text.decode()
+
+                yield Token(source, idx, end, SINGLE_CHARS[text])
+            elif kind == "NUMBER":
+                text = result.group()
+                if binary:
+                    text = text.decode()
+
+                if "." in text:
+                    yield Token(source, idx, end, Token.FLOAT, float(text))
+                else:
+                    yield Token(source, idx, end, Token.INT, int(text))
+            elif kind == "EQUALS":
+                yield Token(source, idx, end, Token.EE if end - idx > 1 else Token.EQ)
+            elif kind == "NOT":
+                yield Token(source, idx, end, Token.NE if end - idx > 1 else Token.NOT)
+            elif kind == "LESS":
+                yield Token(source, idx, end, Token.LTE if end - idx > 1 else Token.LT)
+            elif kind == "GREATER":
+                yield Token(source, idx, end, Token.GTE if end - idx > 1 else Token.GT)
+            elif kind == "STRING":
+                text = result.group("STRINGBODY")
+                if binary:
+                    text = text.decode()
+
+                yield Token(source, idx, end, Token.STRING, ESCAPE_REGEX.sub(r"\1", text))
+
+            idx = end
+
+        yield Token(source, idx, idx, Token.EOF)
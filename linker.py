@@ -0,0 +1,244 @@
+import re
+
+from analysis import CALL_REGEX
+
+CALL_LINE_REGEX = re.compile(r"^(?:(execute .+) run )?function (\S+?):(\S+)$")
+
+# User identifiers cannot contain digits, so only the compiler's branch and switch functions match
+GENERATED_REGEX = re.compile(r"_(?:if|switch)_\d+")
+
+DEFAULT_INLINE_COMMANDS = 1
+
+def bodyLines(text):
+    return text.split("\n") if text else []
+
+class Linker:
+    def __init__(self, exports = (), inline = True, inlineCommands = DEFAULT_INLINE_COMMANDS, removeUnused = True, deduplicate = True):
+        self.exports = list(exports)
+        self.inline = inline
+        self.inlineCommands = inlineCommands
+        self.removeUnused = removeUnused
+        self.deduplicate = deduplicate
+
+        self.inlined = 0
+        self.removed = 0
+        self.merged = 0
+
+    def callees(self, text, namespace, functions):
+        result = []
+
+        for line in bodyLines(text):
+            match = CALL_REGEX.search(line)
+
+            if match != None and match.group(1) == namespace and match.group(2) in functions:
+                result.append(match.group(2))
+
+        return result
+
+    def reachable(self, functions, namespace, roots):
+        seen = set()
+
+        stack = [name for name in roots if name in functions]
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+
+            seen.add(name)
+            stack.extend(self.callees(functions[name], namespace, functions))
+
+        return seen
+
+    def components(self, graph):
+        # Iterative Tarjan, which yields every component after the components it calls into
+        index = {}
+        lowLink = {}
+        onStack = set()
+        stack = []
+        result = []
+
+        counter = 0
+        for root in graph:
+            if root in index:
+                continue
+
+            work = [(root, iter(graph[root]))]
+            index[root] = lowLink[root] = counter
+            counter += 1
+            stack.append(root)
+            onStack.add(root)
+
+            while work:
+                name, edges = work[-1]
+
+                for callee in edges:
+                    if callee not in index:
+                        index[callee] = lowLink[callee] = counter
+                        counter += 1
+                        stack.append(callee)
+                        onStack.add(callee)
+
+                        work.append((callee, iter(graph[callee])))
+                        break
+                    elif callee in onStack:
+                        lowLink[name] = min(lowLink[name], index[callee])
+                else:
+                    work.pop()
+                    if work:
+                        caller = work[-1][0]
+                        lowLink[caller] = min(lowLink[caller], lowLink[name])
+
+                    if lowLink[name] == index[name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            onStack.discard(member)
+                            component.append(member)
+
+                            if member == name:
+                                break
+
+                        result.append(component)
+
+        return result
+
+    def inlineCalls(self, functions, namespace, names):
+        graph = {name: [callee for callee in self.callees(functions[name], namespace, functions) if callee in names] for name in names}
+
+        callSites = {}
+        for name in names:
+            for callee in graph[name]:
+                callSites[callee] = callSites.get(callee, 0) + 1
+
+        components = self.components(graph)
+
+        component = {}
+        for number, members in enumerate(components):
+            for member in members:
+                component[member] = number
+
+        bodies = {}
+        for members in components:
+            for name in members:
+                lines = []
+
+                for line in bodyLines(functions[name]):
+                    match = CALL_LINE_REGEX.match(line)
+
+                    # Calls inside a recursive cycle stay calls, everything else sees its callee's final body
+                    if match == None or match.group(2) != namespace or match.group(3) not in bodies or component[match.group(3)] == component[name]:
+                        lines.append(line)
+                        continue
+
+                    prefix = match.group(1)
+                    callee = bodies[match.group(3)]
+
+                    # Macro lines are only expanded when their own function runs, so they cannot move into a caller
+                    if any(text.startswith("$") for text in callee):
+                        lines.append(line)
+                        continue
+
+                    wanted = len(callee) <= self.inlineCommands or callSites[match.group(3)] == 1
+
+                    if prefix == None:
+                        if wanted:
+                            lines.extend(callee)
+                            self.inlined += 1
+                            continue
+                    elif len(callee) == 0 and " store " not in prefix:
+                        self.inlined += 1
+                        continue
+                    # A conditional call can only take a body that fits in its run clause
+                    elif len(callee) == 1 and wanted:
+                        if callee[0].startswith("execute "):
+                            lines.append(prefix + " " + callee[0][len("execute "):])
+                        else:
+                            lines.append(prefix + " run " + callee[0])
+
+                        self.inlined += 1
+                        continue
+
+                    lines.append(line)
+
+                bodies[name] = lines
+
+        return {name: "\n".join(bodies[name]) for name in names}
+
+    def mergeDuplicates(self, functions, namespace):
+        graph = {name: self.callees(functions[name], namespace, functions) for name in functions}
+
+        # Callees come first, so branches that only differed in which duplicate they called merge too
+        ordered = []
+        cyclic = set()
+        for members in self.components(graph):
+            if len(members) > 1 or members[0] in graph[members[0]]:
+                cyclic.update(members)
+
+            ordered.extend(sorted(members))
+
+        rank = {name: number for number, name in enumerate(sorted(functions))}
+
+        renames = {}
+        canonical = {}
+        bodies = {}
+
+        for name in ordered:
+            text = functions[name]
+
+            if renames:
+                lines = []
+                for line in bodyLines(text):
+                    match = CALL_LINE_REGEX.match(line)
+
+                    if match != None and match.group(2) == namespace and match.group(3) in renames:
+                        target = renames[match.group(3)]
+                        while target in renames:
+                            target = renames[target]
+
+                        line = line[:-len(match.group(3))] + target
+
+                    lines.append(line)
+
+                text = "\n".join(lines)
+
+            bodies[name] = text
+
+            # A function in a cycle may be called from a function that was already rewritten, so it keeps its name
+            if name in cyclic or not GENERATED_REGEX.search(name):
+                continue
+
+            if text in canonical:
+                other = canonical[text]
+                keep, drop = (other, name) if rank[other] < rank[name] else (name, other)
+
+                canonical[text] = keep
+                renames[drop] = keep
+            else:
+                canonical[text] = name
+
+        self.merged = len(renames)
+
+        return {name: bodies[name] for name in functions if name not in renames}
+
+    def link(self, functions, namespace, entries):
+        self.inlined = 0
+        self.removed = 0
+        self.merged = 0
+
+        roots = list(entries) + self.exports
+        linked = dict(functions)
+
+        if self.inline:
+            names = self.reachable(linked, namespace, roots) if self.removeUnused else set(linked)
+            linked.update(self.inlineCalls(linked, namespace, names))
+
+        if self.deduplicate:
+            linked = self.mergeDuplicates(linked, namespace)
+
+        if self.removeUnused:
+            keep = self.reachable(linked, namespace, roots)
+
+            self.removed = len(linked) - len(keep)
+            linked = {name: linked[name] for name in linked if name in keep}
+
+        return linked
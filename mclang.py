@@ -1,10 +1,28 @@
 import os
+import argparse
+import concurrent.futures
 import configparser
+import cProfile
+import io
+import json
+import mmap
 import sys
+import time
+import tracemalloc
 
 from lexer import Lexer
 from parser import Parser
-from compiler import Compiler
+from compiler import Compiler, LoopOptions, fileTemplates
+import arrays
+from optimizer import Optimizer, Peephole
+from commands import Schedule, serialize
+from analysis import CostAnalyzer, Budget, formatCost
+from linker import Linker
+from cache import BuildCache, hashFile, loadAst, saveAst
+from output import Output, DirectoryWriter, ZipWriter
+from diagnostics import Diagnostics, errorInfo, messageInfo
+from daemon import Daemon
+from profiler import Profiler, countNodes
 
 packFormats = {
     "1.21.3": 61,
@@ -34,11 +52,14 @@ def moveBack(path):
     return result
 
 datapackFiles = {
-    "pack.mcmeta": "{\"pack\": {\"pack_format\": <fmt>, \"description\": <desc>}}",
+    "pack.mcmeta": "{\"pack\": {\"pack_format\": <fmt>, \"description\": <desc>}}"
 }
 
-datapackFiles["data" + os.sep + "minecraft" + os.sep + "tags" + os.sep + "functions" + os.sep + "tick.json"] = "{\"values\": [\"<proj>:tick\"]}"
-datapackFiles["data" + os.sep + "minecraft" + os.sep + "tags" + os.sep + "functions" + os.sep + "load.json"] = "{\"values\": [\"<proj>:load\"]}"
+# Tags only list functions that exist, so a pack without a tick function costs nothing per tick
+tagFiles = {
+    "tick": "data/minecraft/tags/functions/tick.json",
+    "load": "data/minecraft/tags/functions/load.json"
+}
 
 def getversion(config, name):
     text = config[name]
@@ -63,6 +84,31 @@ def getstring(config, name):
     
     return text[1:-1]
 
+def getint(config, name, default = None):
+    if not name in config:
+        return default
+
+    try:
+        return int(config[name])
+    except:
+        raise ValueError("Invalid integer")
+
+def getbool(config, name, default = False):
+    if not name in config:
+        return default
+
+    text = config[name].lower()
+    if not text in ("true", "false"):
+        raise ValueError("Invalid boolean (expected true or false)")
+
+    return text == "true"
+
+def getlist(config, name, default = ()):
+    if not name in config:
+        return list(default)
+
+    return [part.strip() for part in config[name].split(",") if part.strip()]
+
 def getformat(version):
     newVersion = []
     for part in version:
@@ -78,79 +124,603 @@ def getformat(version):
     
     return 4
 
-def safeMkDir(path):
-    if not os.path.exists(path):
-        os.mkdir(path)
+BATCH_THREADS = 32
+
+class BuildOptions:
+    def __init__(self, stream = False, verbose = False, profile = False, cprofile = None, zip = None):
+        self.stream = stream
+        self.verbose = verbose
+        self.profile = profile
+        self.cprofile = cprofile
+        self.zip = zip
+
+def streamParse(filePath, profiler):
+    with open(filePath, "rb") as fileIO:
+        if os.fstat(fileIO.fileno()).st_size > 0:
+            code = mmap.mmap(fileIO.fileno(), 0, access = mmap.ACCESS_READ)
+        else:
+            code = b""
+
+        try:
+            profiler.begin()
+
+            lexer = Lexer(filePath, code)
+            parser = Parser(lexer.stream())
+            ast = parser.parse()
+
+            profiler.end("streaming")
+
+            # Errors quote their source line, so they are rendered while the mapping is still open
+            if lexer.error:
+                return None, errorInfo("lexing", lexer.error)
+
+            if ast.error:
+                return None, errorInfo("parsing", ast.error)
+        finally:
+            if isinstance(code, mmap.mmap):
+                code.close()
+
+    if profiler.enabled:
+        profiler.count("streaming", countNodes(ast.node))
+
+    return ast.node, None
+
+def parseUnit(filePath, options, profiler, log):
+    if options.stream:
+        return streamParse(filePath, profiler)
+
+    with open(filePath, "r") as fileIO:
+        code = fileIO.read()
+
+    return parseText(filePath, code, options, profiler, log)
+
+def parseText(filePath, code, options, profiler, log):
+    profiler.begin()
+
+    lexer = Lexer(filePath, code)
+    tokens, error = lexer.lex()
+
+    profiler.end("lexing", len(tokens))
+
+    if error:
+        return None, errorInfo("lexing", error)
+    
+    if options.verbose:
+        log.append(str(tokens))
+
+    profiler.begin()
+
+    parser = Parser(tokens)
+    ast = parser.parse()
+
+    profiler.end("parsing")
+
+    if ast.error:
+        return None, errorInfo("parsing", ast.error)
+
+    if profiler.enabled:
+        profiler.count("parsing", countNodes(ast.node))
+
+    return ast.node, None
+
+def compileTree(node, unitName, namespace, options, log, loopOptions = None):
+    node = Optimizer().visit(node)
+
+    if options.verbose:
+        log.append(str(node))
+
+    compiler = Compiler(namespace, os.path.splitext(unitName)[0].replace(os.sep, "_"), loopOptions)
+
+    code = compiler.visit(node)
+    if options.verbose:
+        log.append(serialize(code))
+
+    functions = {}
+    for name in compiler.files:
+        functions[name] = serialize(Peephole().optimize(compiler.files[name]))
+
+    # Scheduling, array sizes and loop bounds are linked across units, so they travel with the unit's functions
+    return functions, {"schedules": compiler.schedules, "arrays": compiler.arrays, "loops": compiler.loops}
+
+def compileUnit(filePath, unitName, namespace, options, astPath, astCurrent, loopOptions):
+    log = []
+
+    profiler = Profiler(options.profile)
+
+    # Worker processes start without tracing, the main process traces the whole build
+    tracing = options.profile and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    try:
+        node = loadAst(astPath) if astCurrent else None
+
+        if node == None:
+            node, error = parseUnit(filePath, options, profiler, log)
+            if error:
+                return None, None, log, error, profiler.phases
+
+            saveAst(astPath, node)
+
+        if profiler.enabled:
+            profiler.count("compiling", countNodes(node))
+
+        profiler.begin()
+
+        functions, symbols = compileTree(node, unitName, namespace, options, log, loopOptions)
+
+        profiler.end("compiling")
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    return functions, symbols, log, None, profiler.phases
+
+def findUnits(srcPath):
+    units = []
+
+    for folder, dirs, files in os.walk(srcPath):
+        dirs.sort()
+
+        for file in sorted(files):
+            if file.endswith(".mclang"):
+                units.append(os.path.relpath(folder + os.sep + file, srcPath))
+
+    return units
+
+def linkUnits(units, unitFunctions, unitSymbols, projName, config, diagnostics, srcPath = None):
+    owners = {}
+    sizes = {}
+    for unitName in units:
+        functions = unitFunctions[unitName]
+        unitPath = srcPath + os.sep + unitName if srcPath else unitName
+
+        for name in functions:
+            if name in owners:
+                diagnostics.error(messageInfo("linking", f"Function \"{os.path.splitext(name)[0]}\" is defined in both {owners[name]} and {unitName}", unitPath))
+                return None
+
+            owners[name] = unitName
+
+        declared = unitSymbols[unitName]["arrays"]
+        for name in declared:
+            if name in sizes and sizes[name][0] != declared[name]:
+                diagnostics.error(messageInfo("linking", f"Array \"{name}\" has {sizes[name][0]} elements in {sizes[name][1]} but {declared[name]} in {unitName}", unitPath))
+                return None
+
+            sizes[name] = (declared[name], unitName)
+
+    allFunctions = {}
+    schedules = {}
+    loops = {}
+    for unitName in units:
+        functions = unitFunctions[unitName]
+
+        for name in functions:
+            allFunctions[os.path.splitext(name)[0]] = functions[name]
+
+        schedules.update(unitSymbols[unitName]["schedules"])
+        loops.update(unitSymbols[unitName]["loops"])
+
+    # Unused dispatch functions are dropped by the linker like any other unreachable function
+    macros = config.version >= arrays.MACRO_VERSION
+    inits = []
+
+    for name in sorted(sizes):
+        size = sizes[name][0]
+
+        allFunctions.update(arrays.dispatchFunctions(projName, name, size, macros))
+        allFunctions.update(arrays.initFunctions(projName, name, size))
+        inits.append(arrays.initCommand(projName, name, size))
+
+    tickEntries = [name for name in ["tick"] if name in allFunctions]
+    loadEntries = [name for name in ["load"] if name in allFunctions]
+    starts = []
+
+    for name in sorted(schedules):
+        kind, ticks = schedules[name]
+
+        if kind == "every" and ticks == 1:
+            if name not in tickEntries:
+                tickEntries.append(name)
+        else:
+            starts.append(str(Schedule(projName, name, ticks)))
+
+    # Scheduled functions and arrays are set up when the pack loads, so they need a load function even if the project has none
+    if starts or inits:
+        template = fileTemplates["load.mcfunction"]
+
+        if "load" in allFunctions:
+            lines = allFunctions["load"].split("\n")
+        else:
+            lines = list(template)
+            loadEntries.append("load")
+
+        # Arrays exist before the project's own load code runs, which may already write to them
+        split = len(template) if lines[:len(template)] == template else 0
+
+        allFunctions["load"] = "\n".join(lines[:split] + inits + lines[split:] + starts)
+
+    # Linking sees every unit at once, so it runs on the cached text rather than on a unit's IR
+    linker = config.linker
+    allFunctions = linker.link(allFunctions, projName, tickEntries + loadEntries + sorted(schedules))
+    diagnostics.debug(f"Inlined {linker.inlined} calls, merged {linker.merged} duplicate functions and removed {linker.removed} unused functions.")
+
+    # Loops the linker dropped as unreachable are not estimated
+    loops = {name: loops[name] for name in loops if name in allFunctions}
+
+    analyzer = CostAnalyzer(allFunctions, projName, loops)
+    costs = analyzer.analyze(tickEntries + loadEntries + sorted(schedules) + sorted(loops))
+
+    if costs:
+        diagnostics.debug("Command cost per call (worst, typical):")
+        for name in sorted(costs, key = lambda name: (-costs[name][0], name)):
+            diagnostics.debug(f"  {name}: {formatCost(costs[name][0])}, {formatCost(costs[name][1])}")
+
+    if "tick" in costs:
+        diagnostics.debug(f"Commands per tick: {formatCost(costs['tick'][0])} worst, {formatCost(costs['tick'][1])} typical")
+
+    budget = config.budget
 
-def build(projectFolder):
-    projName = projectFolder.split(os.sep)[-1]
-    if os.path.exists(projectFolder):
-        functionPath = projectFolder + os.sep + "build" + os.sep + "data" + os.sep + projName + os.sep + "functions"
-        safeMkDir(projectFolder + os.sep + "build" + os.sep + "data")
+    for name in sorted(loops):
+        iterations = "with no limit" if loops[name] == None else f"at most {loops[name]} times"
+        diagnostics.debug(f"Loop {name} runs {iterations}, up to {formatCost(costs[name][0])} commands against a maxCommandChainLength of {budget.maxChainLength}")
 
-        safeMkDir(projectFolder + os.sep + "build" + os.sep + "data" + os.sep + "minecraft")
-        safeMkDir(projectFolder + os.sep + "build" + os.sep + "data" + os.sep + "minecraft" + os.sep + "tags")
-        safeMkDir(projectFolder + os.sep + "build" + os.sep + "data" + os.sep + "minecraft" + os.sep + "tags" + os.sep + "functions")
+    # Worst case every periodic function comes due on the same tick
+    periodic = [name for name in sorted(schedules) if schedules[name][0] == "every" and name not in tickEntries]
+    delayed = [name for name in sorted(schedules) if schedules[name][0] == "after"]
 
-        safeMkDir(projectFolder + os.sep + "build" + os.sep + "data" + os.sep + projName)
-        safeMkDir(functionPath)
+    problems = budget.check(costs, tickEntries + periodic, loadEntries + delayed, sorted(loops))
+    if problems:
+        for problem in problems:
+            if budget.strict:
+                diagnostics.error(messageInfo("analysis", problem))
+            else:
+                diagnostics.warning(messageInfo("analysis", problem))
 
-        files = [functionPath + os.sep + file for file in os.listdir(functionPath) if os.path.isfile(os.path.join(functionPath, file))]
-        for file in files:
-            os.remove(file)
+        if budget.strict:
+            return None
+
+    output = Output()
+
+    for filePath in config.packFiles:
+        output.add(filePath, config.packFiles[filePath])
+
+    for tag, entries in (("tick", tickEntries), ("load", loadEntries)):
+        if entries:
+            output.add(tagFiles[tag], json.dumps({"values": [f"{projName}:{name}" for name in entries]}))
+
+    for name in allFunctions:
+        output.add(f"data/{projName}/functions/{name}.mcfunction", allFunctions[name])
+
+    return output
+
+class PackConfig:
+    def __init__(self, budget, linker, loopOptions, packFiles, version):
+        self.budget = budget
+        self.linker = linker
+        self.loopOptions = loopOptions
+        self.packFiles = packFiles
+        self.version = version
+
+def readConfig(config, projName):
+    budget = Budget()
+    if config.has_section("budget"):
+        budget.maxChainLength = getint(config["budget"], "maxCommandChainLength", budget.maxChainLength)
+        budget.tick = getint(config["budget"], "tick", budget.tick)
+        budget.strict = getbool(config["budget"], "strict", budget.strict)
+
+    linker = Linker()
+    if config.has_section("link"):
+        linker.exports = getlist(config["link"], "export", linker.exports)
+        linker.inline = getbool(config["link"], "inline", linker.inline)
+        linker.inlineCommands = getint(config["link"], "inlineCommands", linker.inlineCommands)
+        linker.removeUnused = getbool(config["link"], "removeUnused", linker.removeUnused)
+        linker.deduplicate = getbool(config["link"], "deduplicate", linker.deduplicate)
+
+    loopOptions = LoopOptions()
+    if config.has_section("loops"):
+        loopOptions.unroll = getint(config["loops"], "unroll", loopOptions.unroll)
+        loopOptions.maxIterations = getint(config["loops"], "maxIterations", loopOptions.maxIterations)
+
+    version = getversion(config["pack"], "version")
+    desc = getstring(config["pack"], "description")
+
+    useVars = {
+        "fmt": getformat(version),
+        "desc": f"\"{desc}\"",
+        "proj": projName
+    }
+
+    packFiles = {}
+    for filePath in datapackFiles:
+        text = datapackFiles[filePath]
+        for key in useVars:
+            text = text.replace(f"<{key}>", f"{useVars[key]}")
+
+        packFiles[filePath] = text
+
+    return PackConfig(budget, linker, loopOptions, packFiles, version)
+
+class Project:
+    def __init__(self, projectFolder, options = None):
+        if options == None:
+            options = BuildOptions()
+
+        self.options = options
+        self.diagnostics = Diagnostics(options.verbose)
+
+        self.folder = projectFolder
+        self.name = projectFolder.split(os.sep)[-1]
+
+        self.srcPath = projectFolder + os.sep + "src"
+        self.buildPath = projectFolder + os.sep + "build"
+        self.functionRelPath = f"data/{self.name}/functions"
+
+        self.buildCache = None
+
+        # A batch build hands every project the same process pool instead of one each
+        self.executor = None
+
+        self.configStamp = None
+        self.config = None
+
+        # Source hashes are reused while a file's modification time and size stay the same
+        self.stamps = {}
+
+    def stamp(self, path):
+        stat = os.stat(path)
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def sourceHash(self, unitName):
+        path = self.srcPath + os.sep + unitName
+        stamp = self.stamp(path)
+
+        known = self.stamps.get(unitName)
+        if known and known[0] == stamp:
+            return known[1]
+
+        sourceHash = hashFile(path)
+        self.stamps[unitName] = (stamp, sourceHash)
+
+        return sourceHash
+
+    def loadConfig(self):
+        filePath = self.srcPath + os.sep + "config.cfg"
+
+        stamp = self.stamp(filePath)
+        if stamp == self.configStamp:
+            return
 
         config = configparser.ConfigParser()
-        filePath = projectFolder + os.sep + "src" + os.sep + "config.cfg"
         
         config.read(filePath)
 
-        version = getversion(config["pack"], "version")
-        desc = getstring(config["pack"], "description")
+        self.config = readConfig(config, self.name)
+        self.configStamp = stamp
+
+    def build(self):
+        options = self.options
+        diagnostics = self.diagnostics
+        profiler = Profiler(options.profile)
 
-        useVars = {
-            "fmt": getformat(version),
-            "desc": f"\"{desc}\"",
-            "proj": projName
-        }
+        if not os.path.exists(self.folder):
+            diagnostics.error(messageInfo("setup", "Project folder does not exist!", self.folder))
+            return False
 
-        for filePath in datapackFiles:
-            text = datapackFiles[filePath]
-            for key in useVars:
-                text = text.replace(f"<{key}>", f"{useVars[key]}")
+        if options.profile:
+            tracemalloc.start()
 
-            with open(projectFolder + os.sep + "build" + os.sep + filePath, "w") as file:
-                file.write(text)
+        try:
+            buildStart = time.perf_counter()
 
-        filePath = projectFolder + os.sep + "src" + os.sep + "main.mclang"
+            if self.buildCache == None:
+                self.buildCache = BuildCache(self.buildPath)
 
-        if os.path.isfile(filePath):
-            with open(filePath, "r") as fileIO:
-                code = fileIO.read()
-            
-            lexer = Lexer(filePath, code)
-            tokens, error = lexer.lex()
+            buildCache = self.buildCache
+            srcPath = self.srcPath
+            projName = self.name
 
-            if error:
-                print("An error occured during lexing.")
-                print(str(error))
-                exit()
-            
-            print(tokens)
+            self.loadConfig()
 
-            parser = Parser(tokens)
-            ast = parser.parse()
+            loopOptions = self.config.loopOptions
 
-            if ast.error:
-                print("An error occured during parsing.")
-                print(str(ast.error))
-                exit()
+            units = findUnits(srcPath)
+            unitFunctions = {}
+            unitSymbols = {}
+            pending = []
+
+            for unitName in units:
+                sourceHash = self.sourceHash(unitName)
+                functions = buildCache.getFunctions(unitName, sourceHash, projName, loopOptions.key())
+
+                if functions != None:
+                    diagnostics.debug(f"{unitName} is unchanged, using cached build.")
+                    unitFunctions[unitName] = functions
+                    unitSymbols[unitName] = buildCache.getSymbols(unitName)
+                else:
+                    pending.append((unitName, sourceHash))
+
+            jobs = [(srcPath + os.sep + unitName, unitName, projName, options, buildCache.astPath(unitName), buildCache.hasAst(unitName, sourceHash), loopOptions) for unitName, sourceHash in pending]
+
+            # cProfile only sees the current process, so profiled builds compile every unit in it
+            if jobs and self.executor != None and not options.cprofile:
+                results = list(self.executor.map(compileUnit, *zip(*jobs)))
+            elif len(jobs) > 1 and not options.cprofile:
+                with concurrent.futures.ProcessPoolExecutor() as executor:
+                    results = list(executor.map(compileUnit, *zip(*jobs)))
+            else:
+                results = [compileUnit(*job) for job in jobs]
+
+            for (unitName, sourceHash), (functions, symbols, log, error, phases) in zip(pending, results):
+                for text in log:
+                    diagnostics.debug(text)
 
-            print(ast.node)
+                profiler.merge(phases)
 
-            compiler = Compiler(functionPath, projName)
+                if error:
+                    diagnostics.error(error)
+                    return False
 
-            print(compiler.visit(ast.node))
+                unitFunctions[unitName] = functions
+                unitSymbols[unitName] = symbols
+                buildCache.storeUnit(unitName, sourceHash, projName, loopOptions.key(), functions, symbols)
+
+            output = linkUnits(units, unitFunctions, unitSymbols, projName, self.config, diagnostics, srcPath)
+            if output == None:
+                return False
+
+            profiler.begin()
+
+            if options.zip != None:
+                zipPath = options.zip or self.buildPath + os.sep + projName + ".zip"
+                written = ZipWriter(zipPath, buildCache.manifest["archives"]).write(output)
+            else:
+                written = DirectoryWriter(self.buildPath, buildCache.manifest["outputs"]).write(output, [self.functionRelPath])
+
+            buildCache.removeUnits(units)
+            buildCache.save()
+
+            profiler.end("writing", written)
+        finally:
+            if options.profile:
+                tracemalloc.stop()
+
+        if options.profile:
+            totalSeconds = time.perf_counter() - buildStart
+            if options.verbose:
+                diagnostics.write(f"Build profile ({totalSeconds * 1000:.2f} ms total):")
+                diagnostics.write(profiler.format())
+            else:
+                diagnostics.emit({"type": "profile", "seconds": totalSeconds, "phases": profiler.report()})
+
+        return True
+
+def build(projectFolder, options = None):
+    if not Project(projectFolder, options).build():
+        sys.exit(1)
+
+def loadWorkspace(filePath):
+    config = configparser.ConfigParser()
+
+    if not config.read(filePath) or not config.has_section("workspace"):
+        raise ValueError(f"{filePath} has no [workspace] section")
+
+    folder = os.path.dirname(os.path.abspath(filePath))
+
+    return [os.path.join(folder, path) for path in getlist(config["workspace"], "projects")]
+
+def timedBuild(project):
+    start = time.perf_counter()
+
+    try:
+        ok = project.build()
+    except Exception as exception:
+        project.diagnostics.error(messageInfo("setup", f"{type(exception).__name__}: {exception}", project.folder))
+        ok = False
+
+    return ok, time.perf_counter() - start
+
+def buildAll(projectFolders, options = None):
+    if options == None:
+        options = BuildOptions()
+
+    projects = []
+    for projectFolder in projectFolders:
+        project = Project(os.path.normpath(projectFolder), options)
+        project.diagnostics = Diagnostics(options.verbose, io.StringIO(), project.name)
+
+        projects.append(project)
+
+    # tracemalloc and cProfile follow the whole process, so profiled batches build one project at a time
+    threads = 1 if options.profile or options.cprofile else min(len(projects), BATCH_THREADS)
+
+    start = time.perf_counter()
+
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        for project in projects:
+            project.executor = executor
+
+        with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(timedBuild, projects))
+
+    totalSeconds = time.perf_counter() - start
+
+    summary = []
+    for project, (ok, seconds) in zip(projects, results):
+        sys.stdout.write(project.diagnostics.stream.getvalue())
+
+        summary.append({"project": project.name, "folder": project.folder, "ok": ok, "milliseconds": seconds * 1000, "errors": project.diagnostics.errors, "warnings": project.diagnostics.warnings})
+
+    failed = [entry for entry in summary if not entry["ok"]]
+
+    if options.verbose:
+        print(f"Built {len(summary)} projects in {totalSeconds * 1000:.1f} ms, {len(failed)} failed:")
+        for entry in summary:
+            state = "ok" if entry["ok"] else f"failed ({entry['errors']} errors)"
+            print(f"  {entry['project']}: {state}, {entry['warnings']} warnings, {entry['milliseconds']:.1f} ms")
+    else:
+        print(json.dumps({"type": "summary", "ok": not failed, "milliseconds": totalSeconds * 1000, "projects": summary}))
+
+    return not failed
+
+def main(args = None):
+    argParser = argparse.ArgumentParser(prog = "mclang", description = "Compile an MCLang project into a datapack.")
+    argParser.add_argument("projects", metavar = "project", nargs = "*", help = "project folders containing src/ and build/")
+    argParser.add_argument("--workspace", metavar = "FILE", help = "also build every project listed under [workspace] projects in FILE")
+    argParser.add_argument("--stream", action = "store_true", help = "lex and parse sources straight from a memory map")
+    argParser.add_argument("--verbose", action = "store_true", help = "print tokens, trees, generated code and the cost report as text")
+    argParser.add_argument("--profile", action = "store_true", help = "report time, peak memory and throughput of each compiler phase")
+    argParser.add_argument("--cprofile", metavar = "FILE", help = "write cProfile statistics for the build to FILE")
+    argParser.add_argument("--zip", metavar = "FILE", nargs = "?", const = "", help = "write the datapack as one archive (default: build/<project>.zip) instead of a folder tree")
+    argParser.add_argument("--watch", action = "store_true", help = "stay resident and rebuild whenever a file in src/ changes")
+    argParser.add_argument("--interval", type = float, default = 0.1, help = "seconds between checks of src/ in watch mode (default: 0.1)")
+    argParser.add_argument("--socket", metavar = "PATH", nargs = "?", const = "", help = "in watch mode, accept build and stop commands on a local socket (default: build/.cache/mclang.sock)")
+
+    args = argParser.parse_args(args)
+    options = BuildOptions(args.stream, args.verbose, args.profile, args.cprofile, args.zip)
+
+    projectFolders = list(args.projects)
+    if args.workspace != None:
+        projectFolders += loadWorkspace(args.workspace)
+
+    if not projectFolders:
+        argParser.error("expected at least one project folder or --workspace")
+
+    batch = len(projectFolders) > 1 or args.workspace != None
+
+    if batch and args.watch:
+        argParser.error("--watch builds a single project")
+    if batch and options.zip:
+        argParser.error("--zip FILE names a single archive, use --zip without a path to build several projects")
+
+    if args.watch:
+        project = Project(projectFolders[0], options)
+
+        socketPath = None
+        if args.socket != None:
+            socketPath = args.socket or project.buildPath + os.sep + ".cache" + os.sep + "mclang.sock"
+
+        Daemon(project, args.interval, socketPath).run()
+    elif options.cprofile:
+        profile = cProfile.Profile()
+
+        try:
+            if batch:
+                ok = profile.runcall(buildAll, projectFolders, options)
+            else:
+                profile.runcall(build, projectFolders[0], options)
+        finally:
+            profile.dump_stats(options.cprofile)
+
+        if batch and not ok:
+            sys.exit(1)
+    elif batch:
+        if not buildAll(projectFolders, options):
+            sys.exit(1)
     else:
-        print("Project folder does not exist!")
+        build(projectFolders[0], options)
 
-build(sys.argv[1])
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+import bisect
+import re
+
+from lexer import Token
+from parser import NumberNode, CodeBlockNode
+from visitor import Visitor
+from commands import Effects, ScoreSet, ScoreAdd, ScoreOperation, SetBlock, Fill, Execute, isTemp
+
+INT_MIN = -2 ** 31
+INT_RANGE = 2 ** 32
+
+# Whole absolute or relative (~) coordinates, the only ones whose cells line up with fill's box
+GRID_REGEX = re.compile(r"(~?)(-?\d+)?")
+
+# fill refuses boxes past the default commandModificationBlockLimit
+FILL_LIMIT = 32768
+
+# Commands a run of block writes may span, since none of them can see a block
+BLOCK_NEUTRAL = (ScoreSet, ScoreAdd, ScoreOperation)
+
+def wrapInt(value):
+    return (value - INT_MIN) % INT_RANGE + INT_MIN
+
+def isInt(node):
+    return isinstance(node, NumberNode) and node.token.type == Token.INT
+
+class Optimizer(Visitor):
+    def noVisitMethod(self, node):
+        return node
+
+    def makeNumber(self, node, value):
+        return NumberNode(Token(node.source, node.start, node.end, Token.INT, value))
+
+    def visit_CodeBlockNode(self, node):
+        body = []
+        for inst in node.body:
+            inst = yield inst
+
+            if inst == None:
+                continue
+
+            if isinstance(inst, CodeBlockNode):
+                body.extend(inst.body)
+            else:
+                body.append(inst)
+
+        node.body = body
+
+        return node
+
+    def visit_FunctionNode(self, node):
+        node.body = yield node.body
+
+        return node
+
+    def visit_IfNode(self, node):
+        node.cond = yield node.cond
+        node.body = yield node.body
+
+        if isinstance(node.cond, NumberNode):
+            if node.cond.token.value:
+                return node.body
+
+            return None
+
+        return node
+
+    def visit_WhileNode(self, node):
+        node.cond = yield node.cond
+        node.body = yield node.body
+
+        # A constant true condition is left for the compiler, which drops its test
+        if isinstance(node.cond, NumberNode) and not node.cond.token.value:
+            return None
+
+        return node
+
+    def visit_ForNode(self, node):
+        node.first = yield node.first
+        node.last = yield node.last
+        node.body = yield node.body
+
+        return node
+
+    def visit_SwitchNode(self, node):
+        node.subject = yield node.subject
+
+        for case in node.cases:
+            case.body = yield case.body
+
+        if node.default != None:
+            node.default = yield node.default
+
+        # A constant subject picks its branch at compile time
+        if isInt(node.subject):
+            for case in node.cases:
+                if node.subject.token.value in case.values:
+                    return case.body
+
+            return node.default
+
+        return node
+
+    def visit_VarAssignNode(self, node):
+        node.value = yield node.value
+
+        return node
+
+    def visit_ArrayAccessNode(self, node):
+        node.index = yield node.index
+
+        return node
+
+    def visit_ArrayAssignNode(self, node):
+        node.index = yield node.index
+        node.value = yield node.value
+
+        return node
+
+    def visit_CallNode(self, node):
+        args = []
+        for arg in node.args:
+            args.append((yield arg))
+
+        node.args = args
+
+        return node
+
+    def visit_UnaryOpNode(self, node):
+        node.value = yield node.value
+
+        if isinstance(node.value, NumberNode):
+            if node.operation.matches(Token.NOT):
+                return self.makeNumber(node, 0 if node.value.token.value else 1)
+            elif node.operation.matches(Token.SUB) and isInt(node.value):
+                return self.makeNumber(node, wrapInt(-node.value.token.value))
+
+        return node
+
+    def visit_BinOpNode(self, node):
+        node.left = yield node.left
+        node.right = yield node.right
+
+        if not (isInt(node.left) and isInt(node.right)):
+            return node
+
+        left = node.left.token.value
+        right = node.right.token.value
+
+        if node.operation.matches(Token.ADD):
+            value = left + right
+        elif node.operation.matches(Token.SUB):
+            value = left - right
+        elif node.operation.matches(Token.MUL):
+            value = left * right
+        elif node.operation.matches(Token.DIV):
+            # Scoreboard division floors like Java's Math.floorDiv and leaves the score untouched on zero
+            if right == 0:
+                return node
+
+            value = left // right
+        elif node.operation.matches(Token.EE):
+            value = 1 if left == right else 0
+        elif node.operation.matches(Token.NE):
+            value = 1 if left != right else 0
+        elif node.operation.matches(Token.LT):
+            value = 1 if left < right else 0
+        elif node.operation.matches(Token.LTE):
+            value = 1 if left <= right else 0
+        elif node.operation.matches(Token.GT):
+            value = 1 if left > right else 0
+        elif node.operation.matches(Token.GTE):
+            value = 1 if left >= right else 0
+        else:
+            return node
+
+        return self.makeNumber(node, wrapInt(value))
+
+def gridCell(position):
+    kinds = []
+    cell = []
+
+    for text in position:
+        match = GRID_REGEX.fullmatch(text)
+        if match == None or match.group(1) == "" and match.group(2) == None:
+            return None, None
+
+        kinds.append(match.group(1))
+        cell.append(int(match.group(2) or 0))
+
+    return tuple(kinds), tuple(cell)
+
+def gridText(kinds, cell):
+    return tuple(f"{kind}{value}" if kind == "" or value != 0 else kind for kind, value in zip(kinds, cell))
+
+def coverBoxes(cells):
+    # Greedy meshing: grow each box along x, then y, then z while every cell it takes is still uncovered
+    covered = set()
+    boxes = []
+
+    free = lambda cell: cell in cells and cell not in covered
+
+    for cell in sorted(cells, key = lambda cell: (cell[2], cell[1], cell[0])):
+        if cell in covered:
+            continue
+
+        x, y, z = cell
+
+        x2 = x
+        while free((x2 + 1, y, z)) and x2 + 2 - x <= FILL_LIMIT:
+            x2 += 1
+
+        width = x2 - x + 1
+
+        y2 = y
+        while width * (y2 + 2 - y) <= FILL_LIMIT and all(free((i, y2 + 1, z)) for i in range(x, x2 + 1)):
+            y2 += 1
+
+        area = width * (y2 - y + 1)
+
+        z2 = z
+        while area * (z2 + 2 - z) <= FILL_LIMIT and all(free((i, j, z2 + 1)) for i in range(x, x2 + 1) for j in range(y, y2 + 1)):
+            z2 += 1
+
+        for i in range(x, x2 + 1):
+            for j in range(y, y2 + 1):
+                for k in range(z, z2 + 1):
+                    covered.add((i, j, k))
+
+        boxes.append(((x, y, z), (x2, y2, z2)))
+
+    return boxes
+
+def boxCommands(kinds, boxes, block):
+    commands = []
+
+    for start, end in boxes:
+        if start == end:
+            commands.append(SetBlock(gridText(kinds, start), block))
+        else:
+            commands.append(Fill(gridText(kinds, start), gridText(kinds, end), block))
+
+    return commands
+
+def coalesceRun(run):
+    writes = [command for command in run if isinstance(command, SetBlock)]
+    kinds = gridCell(writes[0].position)[0]
+
+    # Later writes win, so each cell keeps only its last block
+    blocks = {}
+    for command in writes:
+        blocks[gridCell(command.position)[1]] = command.block
+
+    cellsByBlock = {}
+    for cell in blocks:
+        cellsByBlock.setdefault(blocks[cell], set()).add(cell)
+
+    # Boxes of different blocks never overlap, so they can be written in any order
+    merged = []
+    for block in cellsByBlock:
+        merged.extend(boxCommands(kinds, coverBoxes(cellsByBlock[block]), block))
+
+    # A solid region can instead be filled with its most common block and then have the rest written over it
+    low = tuple(min(cell[axis] for cell in blocks) for axis in range(3))
+    high = tuple(max(cell[axis] for cell in blocks) for axis in range(3))
+    volume = (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * (high[2] - low[2] + 1)
+
+    if len(cellsByBlock) > 1 and volume == len(blocks) and volume <= FILL_LIMIT:
+        base = max(cellsByBlock, key = lambda block: len(cellsByBlock[block]))
+
+        layered = boxCommands(kinds, [(low, high)], base)
+        for block in cellsByBlock:
+            if block != base:
+                layered.extend(boxCommands(kinds, coverBoxes(cellsByBlock[block]), block))
+
+        if len(layered) < len(merged):
+            merged = layered
+
+    if len(merged) >= len(writes):
+        return run
+
+    # Scoreboard commands never look at blocks, so they can run before the merged writes
+    return [command for command in run if not isinstance(command, SetBlock)] + merged
+
+def coalesceBlocks(commands):
+    result = []
+    run = []
+    runKinds = None
+
+    # A run only spans one coordinate kind per axis, since an absolute and a relative position may name the same cell
+    for command in commands + [None]:
+        kinds = gridCell(command.position)[0] if isinstance(command, SetBlock) else None
+
+        if run and (kinds != None and kinds != runKinds or kinds == None and not isinstance(command, BLOCK_NEUTRAL)):
+            result.extend(coalesceRun(run))
+            run = []
+
+        if kinds != None:
+            run.append(command)
+            runKinds = kinds
+        elif run:
+            run.append(command)
+        elif command != None:
+            result.append(command)
+
+    return result
+
+class Peephole:
+    def optimize(self, commands):
+        # Nothing below makes block writes, so runs of them are merged once up front
+        self.commands = coalesceBlocks(list(commands))
+        self.effects = [command.effects() for command in self.commands]
+        self.index()
+
+        changed = True
+        while changed:
+            changed = False
+
+            for rule in (self.foldLiteral, self.normalizeAdd, self.dropSelfCopy, self.renameCopy, self.dropCopyBack, self.dropDeadStore):
+                idx = 0
+                while idx < len(self.commands):
+                    if self.commands[idx] == None:
+                        idx += 1
+                    elif rule(idx):
+                        changed = True
+                    else:
+                        idx += 1
+
+            if changed:
+                self.compact()
+
+        return self.commands
+
+    def index(self):
+        # Dropped commands stay as None until the round ends, so indices in the event lists stay valid
+        self.events = {}
+
+        for idx, effects in enumerate(self.effects):
+            for holder in effects.reads | effects.kills:
+                self.events.setdefault(holder, []).append(idx)
+
+    def compact(self):
+        live = [idx for idx, command in enumerate(self.commands) if command != None]
+
+        self.commands = [self.commands[idx] for idx in live]
+        self.effects = [self.effects[idx] for idx in live]
+        self.index()
+
+    def replace(self, idx, command):
+        for holder in self.effects[idx].reads | self.effects[idx].kills:
+            events = self.events[holder]
+            del events[bisect.bisect_left(events, idx)]
+
+        self.commands[idx] = command
+        self.effects[idx] = command.effects() if command != None else Effects()
+
+        for holder in self.effects[idx].reads | self.effects[idx].kills:
+            bisect.insort(self.events.setdefault(holder, []), idx)
+
+    def following(self, idx):
+        idx += 1
+        while idx < len(self.commands) and self.commands[idx] == None:
+            idx += 1
+
+        return idx if idx < len(self.commands) else None
+
+    def preceding(self, idx):
+        idx -= 1
+        while idx >= 0 and self.commands[idx] == None:
+            idx -= 1
+
+        return idx if idx >= 0 else None
+
+    def isDeadAfter(self, idx, holder):
+        events = self.events.get(holder, [])
+
+        pos = bisect.bisect_right(events, idx)
+        if pos == len(events):
+            return True
+
+        return holder not in self.effects[events[pos]].reads
+
+    def foldLiteral(self, idx):
+        first = self.commands[idx]
+        if not (isinstance(first, ScoreSet) and isTemp(first.holder) and isinstance(first.value, int)):
+            return False
+
+        nextIdx = self.following(idx)
+        if nextIdx == None:
+            return False
+
+        second = self.commands[nextIdx]
+        if not isinstance(second, ScoreOperation):
+            return False
+
+        temp = first.holder
+        target = second.target
+
+        if second.source != temp or target == temp or not self.isDeadAfter(nextIdx, temp):
+            return False
+
+        value = first.value
+        operation = second.operation
+
+        # Neither add nor remove can take INT_MIN, so that literal keeps its set and operation
+        if operation in ("+=", "-=") and value == INT_MIN:
+            return False
+
+        if operation == "=":
+            command = ScoreSet(target, value)
+        elif operation == "+=":
+            command = ScoreAdd(target, value)
+        elif operation == "-=":
+            command = ScoreAdd(target, wrapInt(-value))
+        elif operation in ("*=", "/=") and value == 1:
+            command = None
+        elif operation == "*=" and value == 0:
+            command = ScoreSet(target, 0)
+        else:
+            return False
+
+        self.replace(nextIdx, command)
+        self.replace(idx, None)
+
+        return True
+
+    def normalizeAdd(self, idx):
+        command = self.commands[idx]
+        if not isinstance(command, ScoreAdd):
+            return False
+
+        if command.value == 0:
+            self.replace(idx, None)
+
+            return True
+
+        # The whole run is summed in one pass, so absorbed commands are never walked over again
+        total = command.value
+        absorbed = []
+
+        nextIdx = self.following(idx)
+        while nextIdx != None:
+            following = self.commands[nextIdx]
+            if not (isinstance(following, ScoreAdd) and following.holder == command.holder):
+                break
+
+            merged = total + following.value
+            if merged != wrapInt(merged) or merged == INT_MIN:
+                break
+
+            total = merged
+            absorbed.append(nextIdx)
+
+            nextIdx = self.following(nextIdx)
+
+        if not absorbed:
+            return False
+
+        for absorbedIdx in absorbed:
+            self.replace(absorbedIdx, None)
+
+        self.replace(idx, ScoreAdd(command.holder, total))
+
+        return True
+
+    def dropSelfCopy(self, idx):
+        command = self.commands[idx]
+        if isinstance(command, ScoreOperation) and command.operation == "=" and command.target == command.source:
+            self.replace(idx, None)
+
+            return True
+
+        return False
+
+    def dropCopyBack(self, idx):
+        prevIdx = self.preceding(idx)
+        if prevIdx == None:
+            return False
+
+        first = self.commands[prevIdx]
+        second = self.commands[idx]
+
+        if isinstance(first, ScoreOperation) and isinstance(second, ScoreOperation) and first.operation == second.operation == "=":
+            if first.target == second.source and first.source == second.target:
+                self.replace(idx, None)
+
+                return True
+
+        return False
+
+    def renameCopy(self, idx):
+        command = self.commands[idx]
+        if not (isinstance(command, ScoreOperation) and command.operation == "=" and isTemp(command.source)):
+            return False
+
+        target = command.target
+        temp = command.source
+
+        if target == temp or not self.isDeadAfter(idx, temp):
+            return False
+
+        start = self.preceding(idx)
+        while start != None:
+            effects = self.effects[start]
+
+            if effects.barrier or not effects.renamable:
+                return False
+            if temp in effects.kills and temp not in effects.reads:
+                break
+            if target in effects.reads or target in effects.writes:
+                return False
+
+            start = self.preceding(start)
+
+        if start == None or target in self.effects[start].writes:
+            return False
+
+        for lineIdx in range(start, idx):
+            if self.commands[lineIdx] != None:
+                self.replace(lineIdx, self.commands[lineIdx].rename(temp, target))
+
+        self.replace(idx, None)
+
+        return True
+
+    def dropDeadStore(self, idx):
+        command = self.commands[idx]
+        effects = self.effects[idx]
+
+        if not isinstance(command, (ScoreSet, ScoreAdd, ScoreOperation, Execute)):
+            return False
+        if effects.barrier or not effects.writes or isinstance(command, Execute) and command.run != None:
+            return False
+
+        for holder in effects.writes:
+            if not isTemp(holder) or not self.isDeadAfter(idx, holder):
+                return False
+
+        self.replace(idx, None)
+
+        return True
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import zipfile
+
+from cache import hashBytes
+
+# Fixed timestamps keep archives byte-identical between builds of the same sources
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+class Output:
+    def __init__(self):
+        self.files = {}
+
+    def add(self, relPath, text):
+        self.files[relPath] = text.encode()
+
+    def digest(self):
+        digest = hashlib.sha256()
+
+        for relPath in sorted(self.files):
+            digest.update(relPath.encode() + b"\0")
+            digest.update(hashBytes(self.files[relPath]).encode())
+
+        return digest.hexdigest()
+
+class DirectoryWriter:
+    def __init__(self, folder, hashes):
+        self.folder = folder
+        self.hashes = hashes
+
+    def path(self, relPath):
+        return self.folder + os.sep + relPath.replace("/", os.sep)
+
+    def write(self, output, cleanFolders = ()):
+        written = 0
+        folders = set()
+
+        for relPath in sorted(output.files):
+            data = output.files[relPath]
+            dataHash = hashBytes(data)
+            fullPath = self.path(relPath)
+
+            if self.hashes.get(relPath) == dataHash and os.path.isfile(fullPath):
+                continue
+
+            folder = os.path.dirname(fullPath)
+            if folder not in folders:
+                os.makedirs(folder, exist_ok = True)
+                folders.add(folder)
+
+            with open(fullPath, "wb") as file:
+                file.write(data)
+
+            self.hashes[relPath] = dataHash
+            written += 1
+
+        for relPath in list(self.hashes):
+            if relPath not in output.files:
+                if os.path.isfile(self.path(relPath)):
+                    os.remove(self.path(relPath))
+
+                del self.hashes[relPath]
+
+        for relFolder in cleanFolders:
+            folder = self.path(relFolder)
+            if not os.path.isdir(folder):
+                continue
+
+            for name in os.listdir(folder):
+                if os.path.isfile(folder + os.sep + name) and relFolder + "/" + name not in output.files:
+                    os.remove(folder + os.sep + name)
+
+        return written
+
+class ZipWriter:
+    def __init__(self, path, hashes):
+        self.path = path
+        self.hashes = hashes
+
+    def write(self, output):
+        digest = output.digest()
+        if self.hashes.get(self.path) == digest and os.path.isfile(self.path):
+            return 0
+
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok = True)
+
+        # Entries are streamed into a sibling file, so a failed build never leaves a truncated archive behind
+        tempPath = self.path + ".tmp"
+        with zipfile.ZipFile(tempPath, "w", zipfile.ZIP_DEFLATED) as archive:
+            for relPath in sorted(output.files):
+                info = zipfile.ZipInfo(relPath, ZIP_DATE)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+
+                archive.writestr(info, output.files[relPath])
+
+        os.replace(tempPath, self.path)
+        self.hashes[self.path] = digest
+
+        return len(output.files)
@@ -1,109 +1,285 @@
+import collections
+import re
+
 from lexer import Token
-import position
 import error
 import const
 
 class NumberNode:
+    __slots__ = ("token", "source", "start", "end")
+
     def __init__(self, token):
         self.token = token
 
-        self.posRange = self.token.posRange
+        self.source = token.source
+        self.start = token.start
+        self.end = token.end
     
     def __repr__(self):
         return f"{self.token.value}"
 
 class StringNode:
+    __slots__ = ("token", "source", "start", "end")
+
     def __init__(self, token):
         self.token = token
 
-        self.posRange = self.token.posRange
+        self.source = token.source
+        self.start = token.start
+        self.end = token.end
     
     def __repr__(self):
         return f"\"{self.token.value}\""
 
 class BinOpNode:
+    __slots__ = ("left", "operation", "right", "source", "start", "end")
+
     def __init__(self, left, operation, right):
         self.left = left
         self.operation = operation
         self.right = right
 
-        self.posRange = [self.left.posRange[0], self.right.posRange[1]]
+        self.source = left.source
+        self.start = left.start
+        self.end = right.end
     
     def __repr__(self):
         return f"({self.left} {self.operation} {self.right})"
 
 class IfNode:
+    __slots__ = ("cond", "body", "source", "start", "end")
+
     def __init__(self, cond, body):
         self.cond = cond
         self.body = body
 
-        self.posRange = [self.cond.posRange[0], self.body.posRange[1]]
+        self.source = cond.source
+        self.start = cond.start
+        self.end = body.end
     
     def __repr__(self):
         return f"if {self.cond} {self.body}"
 
+class CaseNode:
+    __slots__ = ("values", "body", "source", "start", "end")
+
+    def __init__(self, values, body, startTok):
+        self.values = values
+        self.body = body
+
+        self.source = startTok.source
+        self.start = startTok.start
+        self.end = body.end
+
+    def __repr__(self):
+        return f"case {', '.join(str(value) for value in self.values)} {self.body}"
+
+class SwitchNode:
+    __slots__ = ("subject", "cases", "default", "source", "start", "end")
+
+    def __init__(self, subject, cases, default, endTok):
+        self.subject = subject
+        self.cases = cases
+        self.default = default
+
+        self.source = subject.source
+        self.start = subject.start
+        self.end = endTok.end
+
+    def __repr__(self):
+        text = f"switch {self.subject} {{{self.cases}"
+        if self.default != None:
+            text += f", default {self.default}"
+
+        return text + "}"
+
+class WhileNode:
+    __slots__ = ("cond", "body", "source", "start", "end")
+
+    def __init__(self, cond, body):
+        self.cond = cond
+        self.body = body
+
+        self.source = cond.source
+        self.start = cond.start
+        self.end = body.end
+
+    def __repr__(self):
+        return f"while {self.cond} {self.body}"
+
+class ForNode:
+    __slots__ = ("name", "first", "last", "step", "body", "source", "start", "end")
+
+    def __init__(self, name, first, last, step, body):
+        self.name = name
+        self.first = first
+        self.last = last
+        self.step = step
+        self.body = body
+
+        self.source = name.source
+        self.start = name.start
+        self.end = body.end
+
+    def __repr__(self):
+        return f"for {self.name.value} = {self.first}, {self.last}, {self.step} {self.body}"
+
 class UnaryOpNode:
+    __slots__ = ("value", "operation", "source", "start", "end")
+
     def __init__(self, value, operation):
         self.operation = operation
 
         self.value = value
 
-        self.posRange = [self.value.posRange[0], self.operation.posRange[1]]
+        self.source = operation.source
+        self.start = operation.start
+        self.end = value.end
 
     def __repr__(self):
         return f"{self.operation} {self.value}"
 
 class CodeBlockNode:
-    def __init__(self, body):
+    __slots__ = ("body", "source", "start", "end")
+
+    def __init__(self, body, startTok, endTok):
         self.body = body
 
-        if len(self.body) > 0:
-            self.posRange = [self.body[0].posRange, self.body[-1].posRange]
-        else:
-            self.posRange = [position.Position(0, 0, 0, "", ""), position.Position(0, 0, 0, "", "")]
+        self.source = startTok.source
+        self.start = startTok.start
+        self.end = endTok.end
 
     def __repr__(self):
         return "{" + f"{self.body}" + "}"
 
 class FunctionNode:
-    def __init__(self, name, body):
+    __slots__ = ("name", "body", "schedule", "source", "start", "end")
+
+    def __init__(self, name, body, schedule = None):
         self.name = name
         self.body = body
+        self.schedule = schedule
 
-        self.posRange = [self.name.posRange[0], self.body.posRange[1]]
+        self.source = name.source
+        self.start = name.start
+        self.end = body.end
 
     def __repr__(self):
+        if self.schedule != None:
+            return f"func {self.name.value}() {self.schedule[0]} {self.schedule[1]} {self.body}"
+
         return f"func {self.name.value}() {self.body}"
 
 class VarAccessNode:
+    __slots__ = ("name", "source", "start", "end")
+
     def __init__(self, name):
         self.name = name
 
-        self.posRange = self.name.posRange
+        self.source = name.source
+        self.start = name.start
+        self.end = name.end
 
     def __repr__(self):
         return f"{self.name.value}"
 
 class VarAssignNode:
+    __slots__ = ("name", "value", "source", "start", "end")
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
-        self.posRange = [self.name.posRange[0], self.value.posRange[1]]
+        self.source = name.source
+        self.start = name.start
+        self.end = value.end
     
     def __repr__(self):
         return f"{self.name.value} = {self.value}"
 
+class ArrayNode:
+    __slots__ = ("name", "size", "source", "start", "end")
+
+    def __init__(self, name, size, endTok):
+        self.name = name
+        self.size = size
+
+        self.source = name.source
+        self.start = name.start
+        self.end = endTok.end
+
+    def __repr__(self):
+        return f"array {self.name.value}[{self.size}]"
+
+class ArrayAccessNode:
+    __slots__ = ("name", "index", "size", "source", "start", "end")
+
+    def __init__(self, name, index, size, endTok):
+        self.name = name
+        self.index = index
+        self.size = size
+
+        self.source = name.source
+        self.start = name.start
+        self.end = endTok.end
+
+    def __repr__(self):
+        return f"{self.name.value}[{self.index}]"
+
+class ArrayAssignNode:
+    __slots__ = ("name", "index", "value", "size", "source", "start", "end")
+
+    def __init__(self, name, index, value, size):
+        self.name = name
+        self.index = index
+        self.value = value
+        self.size = size
+
+        self.source = name.source
+        self.start = name.start
+        self.end = value.end
+
+    def __repr__(self):
+        return f"{self.name.value}[{self.index}] = {self.value}"
+
 class CallNode:
+    __slots__ = ("value", "args", "source", "start", "end")
+
     def __init__(self, value, args):
         self.value = value
         self.args = args
 
-        self.posRange = self.value.posRange
+        self.source = value.source
+        self.start = value.start
+        self.end = value.end
     
     def __repr__(self):
         return f"{self.value}({self.args})"
 
+BINDING_POWER = {
+    Token.EE: 1,
+    Token.NE: 1,
+    Token.LT: 1,
+    Token.LTE: 1,
+    Token.GT: 1,
+    Token.GTE: 1,
+    Token.ADD: 2,
+    Token.SUB: 2,
+    Token.MUL: 3,
+    Token.DIV: 3
+}
+
+# Block positions are absolute, relative (~) or local (^), and local ones cannot be mixed with the others
+COORDINATE_REGEX = re.compile(r"[~^](?:-?\d+(?:\.\d+)?)?|-?\d+(?:\.\d+)?")
+
+BLOCK_BUILTINS = ("sblock", "gblock")
+
+# Negation binds looser than every operator, so !a == b is !(a == b)
+PREFIX_POWER = {
+    Token.NOT: 0,
+    Token.SUB: 4
+}
+
 class ParseResult:
     def __init__(self):
         self.node = None
@@ -125,108 +301,407 @@ class ParseResult:
 
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.tokenIdx = -1
+        self.tokens = iter(tokens)
+        self.lookahead = collections.deque()
+
+        self.currentTok = None
+
+        # Arrays are declared before use, so every access knows its size for bounds checks and dispatch
+        self.arrays = {}
 
         self.advance()
     
     def advance(self):
-        self.tokenIdx += 1
-
-        if self.tokenIdx < len(self.tokens):
-            self.currentTok = self.tokens[self.tokenIdx]
+        if self.lookahead:
+            self.currentTok = self.lookahead.popleft()
+        else:
+            self.currentTok = next(self.tokens, self.currentTok)
         
         return self.currentTok
 
+    def peek(self, offset = 1):
+        while len(self.lookahead) < offset:
+            token = next(self.tokens, None)
+            if token == None:
+                return self.lookahead[-1] if self.lookahead else self.currentTok
+
+            self.lookahead.append(token)
+
+        return self.lookahead[offset - 1]
+
     def parse(self):
         result = self.codeBlock(False)
 
         return result
 
-    def factor(self):
-        result = ParseResult()
-
+    def atom(self):
         token = self.currentTok
 
-        node = None
-
         if token.type in (Token.INT, Token.FLOAT):
             self.advance()
-            node = NumberNode(token)
+            return NumberNode(token)
         elif token.matches(Token.STRING):
             self.advance()
-            node = StringNode(token)
-        elif token.matches(Token.SUB):
-            self.advance()
-            node = UnaryOpNode(self.expr(), token)
+            return StringNode(token)
         elif token.matches(Token.IDENTIFIER):
             self.advance()
-            node = VarAccessNode(token)
-        elif token.matches(Token.LPAREN):
-            self.advance()
+            return VarAccessNode(token)
 
-            expr = self.expr()
-            if expr.error:
-                return expr
+        return None
 
-            if self.currentTok.type != Token.RPAREN:
-                return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected )"))
-        
+    def arrayIndex(self):
+        result = ParseResult()
+
+        name = self.currentTok
+        if not name.value in self.arrays:
+            return result.failure(error.Error(name, error.Error.INVALID_SYNTAX, f"Unknown array \"{name.value}\""))
+
+        self.advance()
+        self.advance()
+
+        index = self.expr()
+        if index.error:
+            return index
+
+        if type(index.node).__name__ == "StringNode":
+            return result.failure(error.Error(index.node, error.Error.INVALID_SYNTAX, "Array indices are integers"))
+
+        if not self.currentTok.matches(Token.RSQUARE):
+            return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ]"))
+
+        size = self.arrays[name.value]
+        if type(index.node).__name__ == "NumberNode" and index.node.token.type == Token.INT and index.node.token.value >= size:
+            return result.failure(error.Error(index.node, error.Error.INVALID_SYNTAX, f"Index {index.node.token.value} is out of range for \"{name.value}\" ({size} elements)"))
+
+        endTok = self.currentTok
+        self.advance()
+
+        return result.success(ArrayAccessNode(name, index.node, size, endTok))
+
+    def builtinArgs(self, name):
+        result = ParseResult()
+
+        args = []
+        while not self.currentTok.matches(Token.RPAREN):
+            arg = self.expr()
+            if arg.error:
+                return arg
+
+            args.append(arg.node)
+
+            if not (self.currentTok.matches(Token.COMMA) or self.currentTok.matches(Token.RPAREN)):
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected , or )"))
+
+            if self.currentTok.matches(Token.RPAREN):
+                break
+            else:
+                self.advance()
+
+        endTok = self.currentTok
+        self.advance()
+
+        if name.value in BLOCK_BUILTINS:
+            failure = self.blockArgs(name, args, endTok)
+            if failure:
+                return result.failure(failure)
+
+        return result.success(args)
+
+    def blockArgs(self, name, args, endTok):
+        if len(args) != 4:
+            return error.Error(endTok, error.Error.INVALID_SYNTAX, f"{name.value} takes x, y, z and a block")
+
+        local = []
+        for arg in args[:3]:
+            if type(arg).__name__ == "StringNode" and COORDINATE_REGEX.fullmatch(arg.token.value):
+                local.append(arg.token.value.startswith("^"))
+                continue
+
+            value = arg.value if type(arg).__name__ == "UnaryOpNode" and arg.operation.matches(Token.SUB) else arg
+            if type(value).__name__ == "NumberNode" and value.token.type == Token.INT:
+                local.append(False)
+                continue
+
+            return error.Error(arg, error.Error.INVALID_SYNTAX, "Block coordinates are integers or strings like \"~1\" or \"^\"")
+
+        if any(local) and not all(local):
+            return error.Error(args[0], error.Error.INVALID_SYNTAX, "Local (^) coordinates cannot be mixed with other coordinates")
+
+        if type(args[3]).__name__ != "StringNode" or not args[3].token.value:
+            return error.Error(args[3], error.Error.INVALID_SYNTAX, "Expected a block id string")
+
+        return None
+
+    def signedInt(self):
+        sign = 1
+        if self.currentTok.matches(Token.SUB):
+            sign = -1
             self.advance()
 
-            node = expr.node
+        if not self.currentTok.matches(Token.INT):
+            return None
 
-        if node == None:
-            return result.failure(error.Error(token.posRange, error.Error.INVALID_SYNTAX, "Expected int or float or string or identifier or ("))
+        value = sign * self.currentTok.value
+        self.advance()
 
-        return node
+        return value
 
-    def binOp(self, finder, opTokens):
+    def switch(self):
         result = ParseResult()
 
-        left = result.register(finder())
+        subject = self.expr()
+        if subject.error:
+            return subject
+
+        if type(subject.node).__name__ == "StringNode":
+            return result.failure(error.Error(subject.node, error.Error.INVALID_SYNTAX, "Can only switch on integers"))
+
+        if not self.currentTok.matches(Token.LCURLY):
+            return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected {"))
+
+        self.advance()
+
+        cases = []
+        default = None
+        seen = set()
+
+        while not self.currentTok.matches(Token.RCURLY):
+            if self.currentTok.matches(Token.IDENTIFIER, "case"):
+                startTok = self.currentTok
+                self.advance()
+
+                values = []
+                while True:
+                    valueTok = self.currentTok
+
+                    value = self.signedInt()
+                    if value == None:
+                        return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected an integer"))
+
+                    if value in seen:
+                        return result.failure(error.Error(valueTok, error.Error.INVALID_SYNTAX, f"Duplicate case {value}"))
+
+                    seen.add(value)
+                    values.append(value)
+
+                    if not self.currentTok.matches(Token.COMMA):
+                        break
+
+                    self.advance()
+
+                body = self.codeBlock()
+                if body.error:
+                    return body
+
+                cases.append(CaseNode(values, body.node, startTok))
+            elif self.currentTok.matches(Token.IDENTIFIER, "default"):
+                if default != None:
+                    return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Duplicate default"))
+
+                self.advance()
 
-        while self.currentTok.type in opTokens:
-            opToken = self.currentTok
+                body = self.codeBlock()
+                if body.error:
+                    return body
+
+                default = body.node
+            else:
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected case or default or }"))
+
+        endTok = self.currentTok
+        self.advance()
+
+        return result.success(SwitchNode(subject.node, cases, default, endTok))
+
+    def assignment(self, node, name):
+        stack = [node]
+        while stack:
+            item = stack.pop()
+
+            if isinstance(item, list):
+                stack.extend(item)
+            elif type(item).__name__ in ("VarAssignNode", "ForNode") and item.name.value == name:
+                return item.name
+            elif type(item).__name__.endswith("Node"):
+                for slot in type(item).__slots__:
+                    value = getattr(item, slot)
+                    if isinstance(value, list) or type(value).__name__.endswith("Node"):
+                        stack.append(value)
+
+        return None
+
+    def forLoop(self):
+        result = ParseResult()
+
+        if not self.currentTok.matches(Token.IDENTIFIER):
+            return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected identifier"))
+
+        name = self.currentTok
+
+        self.advance()
+        if not self.currentTok.matches(Token.EQ):
+            return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ="))
+
+        self.advance()
+
+        first = self.expr()
+        if first.error:
+            return first
+
+        if not self.currentTok.matches(Token.COMMA):
+            return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ,"))
+
+        self.advance()
+
+        last = self.expr()
+        if last.error:
+            return last
+
+        for bound in (first.node, last.node):
+            if type(bound).__name__ == "StringNode":
+                return result.failure(error.Error(bound, error.Error.INVALID_SYNTAX, "Loops only count with integers"))
+
+        step = 1
+        if self.currentTok.matches(Token.COMMA):
             self.advance()
-            right = result.register(finder())
-            if type(right).__name__ == "StringNode":
-                return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Operations with strings are not supported"))
-            if type(left).__name__ == "StringNode":
-                return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Operations with strings are not supported"))
 
-            left = BinOpNode(left, opToken, right)
-        
-        return result.success(left)
+            stepTok = self.currentTok
+
+            step = self.signedInt()
+            if step == None:
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected an integer"))
+
+            if step == 0:
+                return result.failure(error.Error(stepTok, error.Error.INVALID_SYNTAX, "Loop step cannot be 0"))
+
+            # The step becomes a scoreboard add or remove, which only take up to 2147483647
+            if abs(step) > 2 ** 31 - 1:
+                return result.failure(error.Error(stepTok, error.Error.INVALID_SYNTAX, "Loop step must be between -2147483647 and 2147483647"))
+
+        body = self.codeBlock()
+        if body.error:
+            return body
+
+        # The loop decides when the variable changes, which is what lets constant loops be unrolled
+        assigned = self.assignment(body.node, name.value)
+        if assigned != None:
+            return result.failure(error.Error(assigned, error.Error.INVALID_SYNTAX, f"Loop variable \"{name.value}\" cannot be assigned inside the loop"))
+
+        return result.success(ForNode(name, first.node, last.node, step, body.node))
+
+    def reduce(self, operands, operators):
+        kind, opToken, power = operators.pop()
+
+        if kind == "prefix":
+            if type(operands[-1]).__name__ == "StringNode":
+                return error.Error(opToken, error.Error.INVALID_SYNTAX, "Operations with strings are not supported")
 
-    def term(self):
-        return self.binOp(self.factor, (Token.MUL, Token.DIV))
+            operands.append(UnaryOpNode(operands.pop(), opToken))
+
+            return None
+
+        right = operands.pop()
+        left = operands.pop()
+
+        if type(left).__name__ == "StringNode" or type(right).__name__ == "StringNode":
+            return error.Error(opToken, error.Error.INVALID_SYNTAX, "Operations with strings are not supported")
+
+        operands.append(BinOpNode(left, opToken, right))
+
+        return None
+
+    def reduceWhile(self, operands, operators, power):
+        while operators and operators[-1][0] != "paren" and operators[-1][2] >= power:
+            failure = self.reduce(operands, operators)
+            if failure:
+                return failure
+
+        return None
 
     def expr(self):
-        return self.compExpr()
-    
-    def compExpr(self):
         result = ParseResult()
 
-        opTok = self.currentTok
-        if opTok.matches(Token.NOT):
-            self.advance()
+        # Precedence climbing over explicit stacks, so nesting depth is only bounded by memory
+        operands = []
+        operators = []
+        parens = 0
 
-            expr = self.expr()
-            if expr.error:
-                return expr
-            
-            return result.success(UnaryOpNode(expr.node, opTok))
+        while True:
+            while True:
+                token = self.currentTok
+
+                if token.type in PREFIX_POWER:
+                    operators.append(("prefix", token, PREFIX_POWER[token.type]))
+                elif token.matches(Token.LPAREN):
+                    operators.append(("paren", token, 0))
+                    parens += 1
+                else:
+                    break
+
+                self.advance()
+
+            if self.currentTok.matches(Token.IDENTIFIER) and self.peek().matches(Token.LSQUARE):
+                access = self.arrayIndex()
+                if access.error:
+                    return access
+
+                node = access.node
+            elif self.currentTok.matches(Token.IDENTIFIER, "gblock") and self.peek().matches(Token.LPAREN):
+                name = self.currentTok
+
+                self.advance()
+                self.advance()
+
+                args = self.builtinArgs(name)
+                if args.error:
+                    return args
+
+                node = CallNode(VarAccessNode(name), args.node)
+            else:
+                node = self.atom()
+
+            if node == None:
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected int or float or string or identifier or ("))
+
+            operands.append(node)
+
+            while True:
+                token = self.currentTok
+
+                if token.type in BINDING_POWER:
+                    failure = self.reduceWhile(operands, operators, BINDING_POWER[token.type])
+                    if failure:
+                        return result.failure(failure)
+
+                    operators.append(("binary", token, BINDING_POWER[token.type]))
+                    self.advance()
+
+                    break
+                elif token.matches(Token.RPAREN) and parens > 0:
+                    failure = self.reduceWhile(operands, operators, 0)
+                    if failure:
+                        return result.failure(failure)
+
+                    operators.pop()
+                    parens -= 1
+
+                    self.advance()
+                else:
+                    failure = self.reduceWhile(operands, operators, 0)
+                    if failure:
+                        return result.failure(failure)
 
-        return self.binOp(self.arithExpr, (Token.EE, Token.NE))
+                    if parens > 0:
+                        return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected )"))
 
-    def arithExpr(self):
-        return self.binOp(self.term, (Token.ADD, Token.SUB))
+                    return result.success(operands.pop())
     
     def codeBlock(self, curly = True):
         result = ParseResult()
 
         if self.currentTok.matches(Token.LCURLY) or not curly:
+            startTok = self.currentTok
+
             if curly:
                 self.advance()
             
@@ -242,13 +717,15 @@ class Parser:
                     return action
                 
                 body.append(action.node)
+
+            endTok = self.currentTok
             
             if curly:
                 self.advance()
 
-            return result.success(CodeBlockNode(body))
+            return result.success(CodeBlockNode(body, startTok, endTok))
         else:
-            return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected {"))
+            return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected {"))
 
     def action(self):
         result = ParseResult()
@@ -257,24 +734,36 @@ class Parser:
             self.advance()
 
             if not self.currentTok.matches(Token.IDENTIFIER):
-                return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected identifier"))
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected identifier"))
             
             name = self.currentTok
 
             self.advance()
             if not self.currentTok.matches(Token.LPAREN):
-                return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected ("))
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ("))
             self.advance()
             if not self.currentTok.matches(Token.RPAREN):
-                return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected )"))
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected )"))
             
             self.advance()
 
+            schedule = None
+            if self.currentTok.matches(Token.IDENTIFIER, "every") or self.currentTok.matches(Token.IDENTIFIER, "after"):
+                kind = self.currentTok.value
+
+                self.advance()
+                if not self.currentTok.matches(Token.INT) or self.currentTok.value < 1:
+                    return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected a tick count of at least 1"))
+
+                schedule = (kind, self.currentTok.value)
+
+                self.advance()
+
             body = self.codeBlock()
             if body.error:
                 return body
             
-            return result.success(FunctionNode(name, body.node))
+            return result.success(FunctionNode(name, body.node, schedule))
         elif self.currentTok.matches(Token.KEYWORD, "if"):
             self.advance()
 
@@ -282,11 +771,88 @@ class Parser:
             if cond.error:
                 return cond
 
+            if type(cond.node).__name__ == "StringNode":
+                return result.failure(error.Error(cond.node, error.Error.INVALID_SYNTAX, "Conditions are integers, not strings"))
+
             body = self.codeBlock()
             if body.error:
                 return body
             
             return result.success(IfNode(cond.node, body.node))
+        elif self.currentTok.matches(Token.KEYWORD, "while"):
+            self.advance()
+
+            cond = self.expr()
+            if cond.error:
+                return cond
+
+            if type(cond.node).__name__ == "StringNode":
+                return result.failure(error.Error(cond.node, error.Error.INVALID_SYNTAX, "Conditions are integers, not strings"))
+
+            body = self.codeBlock()
+            if body.error:
+                return body
+
+            return result.success(WhileNode(cond.node, body.node))
+        elif self.currentTok.matches(Token.KEYWORD, "for"):
+            self.advance()
+
+            return self.forLoop()
+        elif self.currentTok.matches(Token.KEYWORD, "switch"):
+            self.advance()
+
+            return self.switch()
+        elif self.currentTok.matches(Token.KEYWORD, "array"):
+            self.advance()
+
+            if not self.currentTok.matches(Token.IDENTIFIER):
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected identifier"))
+
+            name = self.currentTok
+
+            self.advance()
+            if not self.currentTok.matches(Token.LSQUARE):
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ["))
+
+            self.advance()
+            if not self.currentTok.matches(Token.INT) or self.currentTok.value < 1:
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected an array size of at least 1"))
+
+            size = self.currentTok.value
+
+            self.advance()
+            if not self.currentTok.matches(Token.RSQUARE):
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ]"))
+
+            if self.arrays.get(name.value, size) != size:
+                return result.failure(error.Error(name, error.Error.INVALID_SYNTAX, f"Array \"{name.value}\" was already declared with {self.arrays[name.value]} elements"))
+
+            self.arrays[name.value] = size
+
+            endTok = self.currentTok
+            self.advance()
+
+            return result.success(ArrayNode(name, size, endTok))
+        elif self.currentTok.matches(Token.IDENTIFIER) and self.peek().matches(Token.LSQUARE):
+            access = self.arrayIndex()
+            if access.error:
+                return access
+
+            if not self.currentTok.matches(Token.EQ):
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ="))
+
+            self.advance()
+
+            value = self.expr()
+            if value.error:
+                return value
+
+            if type(value.node).__name__ == "StringNode":
+                return result.failure(error.Error(value.node, error.Error.INVALID_SYNTAX, "Arrays only hold integers"))
+
+            node = access.node
+
+            return result.success(ArrayAssignNode(node.name, node.index, value.node, node.size))
         elif self.currentTok.matches(Token.IDENTIFIER):
             name = self.currentTok
             
@@ -294,40 +860,37 @@ class Parser:
 
             if self.currentTok.matches(Token.LPAREN):
                 self.advance()
-                
+
+                if name.value == "gblock":
+                    return result.failure(error.Error(name, error.Error.INVALID_SYNTAX, "gblock tests a block, so it belongs in a condition or an expression"))
+
                 args = []
                 if name.value in const.BUILTINFUNC:
-                    while not self.currentTok.matches(Token.RPAREN):
-                        arg = self.expr()
-                        if arg.error:
-                            return arg
-                        
-                        args.append(arg.node)
-
-                        if not (self.currentTok.matches(Token.COMMA) or self.currentTok.matches(Token.RPAREN)):
-                            return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected , or )"))
-                        
-                        if self.currentTok.matches(Token.RPAREN):
-                            break
-                        else:
-                            self.advance()
+                    builtin = self.builtinArgs(name)
+                    if builtin.error:
+                        return builtin
+
+                    args = builtin.node
                 else:
                     if not self.currentTok.matches(Token.RPAREN):
-                        return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected )"))
-                
-                self.advance()
+                        return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected )"))
+
+                    self.advance()
 
                 return result.success(CallNode(VarAccessNode(name), args))
 
             if not self.currentTok.matches(Token.EQ):
-                return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected ="))
+                return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected ="))
 
             self.advance()
 
             value = self.expr()
             if value.error:
                 return value
+
+            if type(value.node).__name__ == "StringNode":
+                return result.failure(error.Error(value.node, error.Error.INVALID_SYNTAX, "Variables only hold integers"))
             
             return result.success(VarAssignNode(name, value.node))
 
-        return result.failure(error.Error(self.currentTok.posRange, error.Error.INVALID_SYNTAX, "Expected func or if or identifier"))
\ No newline at end of file
+        return result.failure(error.Error(self.currentTok, error.Error.INVALID_SYNTAX, "Expected func or if or while or for or switch or array or identifier"))
\ No newline at end of file
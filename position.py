@@ -1,21 +1,71 @@
-class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
-        self.idx = idx
-        self.ln = ln
-        self.col = col
+import bisect
+
+class SourceFile:
+    __slots__ = ("fn", "ftxt", "lineStarts")
 
+    def __init__(self, fn, ftxt):
         self.fn = fn
         self.ftxt = ftxt
-    
-    def advance(self, currentChar):
-        self.idx += 1
-        self.col += 1
-
-        if currentChar == "\n":
-            self.ln += 1
-            self.col = 0
-        
-        return self
-
-    def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
\ No newline at end of file
+
+        self.lineStarts = None
+
+    def __getstate__(self):
+        return self.fn
+
+    def __setstate__(self, fn):
+        self.fn = fn
+        self.ftxt = None
+
+        self.lineStarts = None
+
+    def getLineStarts(self):
+        if self.ftxt == None:
+            with open(self.fn, "r") as file:
+                self.ftxt = file.read()
+
+        if self.lineStarts == None:
+            lineStarts = [0]
+            newline = "\n" if isinstance(self.ftxt, str) else b"\n"
+
+            idx = self.ftxt.find(newline)
+            while idx != -1:
+                lineStarts.append(idx + 1)
+                idx = self.ftxt.find(newline, idx + 1)
+
+            self.lineStarts = lineStarts
+
+        return self.lineStarts
+
+    def lineCol(self, idx):
+        lineStarts = self.getLineStarts()
+        ln = bisect.bisect_right(lineStarts, idx) - 1
+
+        return ln, idx - lineStarts[ln]
+
+    def line(self, ln):
+        lineStarts = self.getLineStarts()
+        if ln + 1 < len(lineStarts):
+            text = self.ftxt[lineStarts[ln]:lineStarts[ln + 1] - 1]
+        else:
+            text = self.ftxt[lineStarts[ln]:]
+
+        if not isinstance(text, str):
+            text = text.decode(errors = "replace")
+
+        return text
+
+class Position:
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source, start, end = None):
+        self.source = source
+        self.start = start
+        self.end = end if end != None else start
+
+    @property
+    def ln(self):
+        return self.source.lineCol(self.start)[0]
+
+    @property
+    def col(self):
+        return self.source.lineCol(self.start)[1]
@@ -0,0 +1,103 @@
+import time
+import tracemalloc
+
+PHASES = {
+    "lexing": "tokens",
+    "parsing": "nodes",
+    "streaming": "nodes",
+    "compiling": "nodes",
+    "writing": "files"
+}
+
+def countNodes(node):
+    count = 0
+
+    stack = [node]
+    while stack:
+        item = stack.pop()
+
+        if isinstance(item, list):
+            stack.extend(item)
+        elif type(item).__name__.endswith("Node"):
+            count += 1
+
+            for name in type(item).__slots__:
+                value = getattr(item, name)
+                if isinstance(value, list) or type(value).__name__.endswith("Node"):
+                    stack.append(value)
+
+    return count
+
+class Profiler:
+    def __init__(self, enabled = False):
+        self.enabled = enabled
+        self.phases = {}
+
+        self.startTime = 0
+        self.startMemory = 0
+
+    def begin(self):
+        if not self.enabled:
+            return
+
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.startMemory = tracemalloc.get_traced_memory()[0]
+
+        self.startTime = time.perf_counter()
+
+    def end(self, phase, count = 0):
+        if not self.enabled:
+            return
+
+        elapsed = time.perf_counter() - self.startTime
+
+        peak = 0
+        if tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1] - self.startMemory
+
+        self.add(phase, elapsed, peak, count)
+
+    def count(self, phase, count):
+        if self.enabled:
+            self.add(phase, 0, 0, count)
+
+    def add(self, phase, elapsed, peak, count):
+        entry = self.phases.setdefault(phase, [0, 0, 0])
+
+        entry[0] += elapsed
+        entry[1] = max(entry[1], peak)
+        entry[2] += count
+
+    def merge(self, phases):
+        for phase in phases:
+            self.add(phase, *phases[phase])
+
+    def report(self):
+        result = {}
+
+        for phase in PHASES:
+            if phase in self.phases:
+                seconds, peak, count = self.phases[phase]
+                unit = PHASES[phase]
+
+                result[phase] = {
+                    "seconds": seconds,
+                    "peakBytes": peak,
+                    unit: count,
+                    f"{unit}PerSecond": count / seconds if seconds > 0 else 0
+                }
+
+        return result
+
+    def format(self):
+        lines = []
+
+        report = self.report()
+        for phase in report:
+            entry = report[phase]
+            unit = PHASES[phase]
+
+            lines.append(f"  {phase}: {entry['seconds'] * 1000:.2f} ms, {entry[unit]} {unit} ({entry[unit + 'PerSecond']:.0f} {unit}/s), peak {entry['peakBytes'] / 1024:.1f} KiB")
+
+        return "\n".join(lines)
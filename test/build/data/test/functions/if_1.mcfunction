@@ -1,4 +0,0 @@
-scoreboard players operation a MClangTemp = x MClangVars
-scoreboard players set b MClangTemp 2
-scoreboard players operation a MClangTemp /= b MClangTemp
-scoreboard players operation x MClangVars = a MClangTemp
\ No newline at end of file
@@ -0,0 +1,2 @@
+scoreboard players set b MClangTemp 2
+scoreboard players operation x MClangVars /= b MClangTemp
\ No newline at end of file
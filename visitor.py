@@ -0,0 +1,32 @@
+import types
+
+class Visitor:
+    def visit(self, node):
+        # Visit methods that yield a child get its result sent back, so the tree is walked with an explicit stack
+        stack = []
+
+        result = self.enter(node, stack)
+        while stack:
+            try:
+                child = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+            else:
+                result = self.enter(child, stack)
+
+        return result
+
+    def enter(self, node, stack):
+        method = getattr(self, f"visit_{type(node).__name__}", self.noVisitMethod)
+        result = method(node)
+
+        if isinstance(result, types.GeneratorType):
+            stack.append(result)
+
+            return None
+
+        return result
+
+    def noVisitMethod(self, node):
+        raise Exception(f"No visit method defined for {type(node).__name__}")